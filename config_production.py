@@ -159,14 +159,22 @@ def get_postgres_engine():
 
 def get_sqlite_engine():
     """Get SQLite engine for session cache"""
-    from sqlalchemy import create_engine, text
-    engine = create_engine(SQLITE_CONNECTION, echo=False)
+    from sqlalchemy import create_engine, event
+    engine = create_engine(
+        SQLITE_CONNECTION,
+        echo=False,
+        insertmanyvalues_page_size=1000,  # Rows per multi-VALUES INSERT batch
+    )
     
-    with engine.connect() as conn:
-        conn.execute(text("PRAGMA journal_mode=WAL;"))
-        conn.execute(text("PRAGMA synchronous=NORMAL;"))
-        conn.execute(text("PRAGMA cache_size=-64000;"))
-        conn.commit()
+    # SQLite optimizations - synchronous/cache_size are per-connection,
+    # so apply them to every pooled connection, not just the first
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+        cursor.execute("PRAGMA cache_size=-64000;")
+        cursor.close()
     
     return engine
 
@@ -331,20 +331,28 @@ def get_postgres_engine():
         pool_size=PG_POOL_SIZE,
         max_overflow=PG_MAX_OVERFLOW,
         pool_timeout=PG_POOL_TIMEOUT,
+        pool_pre_ping=True,  # Verify connections before use
         echo=False,
     )
 
 def get_sqlite_engine():
     """Get SQLite engine"""
-    from sqlalchemy import create_engine, text
-    engine = create_engine(SQLITE_CONNECTION, echo=False)
+    from sqlalchemy import create_engine, event
+    engine = create_engine(
+        SQLITE_CONNECTION,
+        echo=False,
+        insertmanyvalues_page_size=1000,  # Rows per multi-VALUES INSERT batch
+    )
     
-    # SQLite optimizations
-    with engine.connect() as conn:
-        conn.execute(text("PRAGMA journal_mode=WAL;"))
-        conn.execute(text("PRAGMA synchronous=NORMAL;"))
-        conn.execute(text("PRAGMA cache_size=-64000;"))
-        conn.commit()
+    # SQLite optimizations - synchronous/cache_size are per-connection,
+    # so apply them to every pooled connection, not just the first
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+        cursor.execute("PRAGMA cache_size=-64000;")
+        cursor.close()
     
     return engine
 
@@ -7,8 +7,9 @@ from contextlib import contextmanager
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float, Date, DateTime, BigInteger,
-    ForeignKey, UniqueConstraint, Boolean, Text, Index
+    ForeignKey, UniqueConstraint, Boolean, Text, Index, JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.exc import IntegrityError
 
@@ -153,15 +154,19 @@ class UpdateLog(Base):
 # SAVED PORTFOLIOS (NEW FOR WEB APP)
 # ============================================================================
 
+# JSONB on PostgreSQL, plain JSON (text) on the SQLite working database
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
+
 class SavedPortfolio(Base):
     """User-saved portfolio configurations"""
     __tablename__ = 'saved_portfolios'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False, index=True)
-    tickers = Column(Text, nullable=False)  # JSON: ["AAPL.US", "MSFT.US"]
-    weights = Column(Text, nullable=False)  # JSON: {"AAPL.US": 0.50, "MSFT.US": 0.50}
-    constraints = Column(Text)  # JSON: {"AAPL.US": {"min": 0.1, "max": 0.7}}
+    tickers = Column(JSONType, nullable=False)  # ["AAPL.US", "MSFT.US"]
+    weights = Column(JSONType, nullable=False)  # {"AAPL.US": 0.50, "MSFT.US": 0.50}
+    constraints = Column(JSONType)  # {"AAPL.US": {"min": 0.1, "max": 0.7}}
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -169,6 +174,18 @@ class SavedPortfolio(Base):
         return f"<SavedPortfolio(name='{self.name}', created='{self.created_at}')>"
 
 
+# Converts PostgreSQL databases created while these columns were TEXT; applied at startup
+# by DataManager.ensure_saved_portfolio_json_columns() while they are still TEXT.
+# Optional follow-up for "portfolios containing ticker X" queries:
+#   CREATE INDEX IF NOT EXISTS idx_saved_portfolios_tickers ON saved_portfolios USING GIN (tickers);
+SAVED_PORTFOLIOS_JSONB_MIGRATION_SQL = """
+ALTER TABLE saved_portfolios
+    ALTER COLUMN tickers TYPE JSONB USING tickers::jsonb,
+    ALTER COLUMN weights TYPE JSONB USING weights::jsonb,
+    ALTER COLUMN constraints TYPE JSONB USING constraints::jsonb
+"""
+
+
 # ============================================================================
 # ENHANCED TABLES (Fundamentals, Classification, etc.)
 # ============================================================================
@@ -7,6 +7,8 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -24,6 +26,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Price rows fetched from PostgreSQL (and inserted into SQLite) per chunk
+PRICE_COPY_CHUNK_SIZE = 10000
+
 
 def get_tickers_to_materialize():
     """
@@ -52,78 +57,89 @@ def get_tickers_to_materialize():
     return tickers
 
 
-def copy_asset(pg_session, sqlite_session, symbol):
-    """Copy asset and related data from PostgreSQL to SQLite"""
+def upsert_assets(pg_session, sqlite_session, symbols):
+    """
+    Copy asset rows from PostgreSQL to SQLite in one bulk INSERT ... ON CONFLICT
+    
+    Returns:
+        Set of symbols that were found in PostgreSQL
+    """
+    pg_assets = pg_session.query(Asset).filter(Asset.symbol.in_(symbols)).all()
+    if not pg_assets:
+        return set()
+    
+    now = datetime.utcnow()
+    asset_rows = [{
+        'symbol': a.symbol,
+        'code': a.code,
+        'exchange': a.exchange,
+        'name': a.name,
+        'asset_type': a.asset_type,
+        'isin': a.isin,
+        'currency': a.currency,
+        'country': a.country,
+        'is_active': a.is_active,
+        'is_in_working_db': True,
+        'first_seen': a.first_seen,
+        'last_updated': now,
+        'last_price_date': a.last_price_date,
+        'data_source': a.data_source
+    } for a in pg_assets]
+    
+    # Existing rows only get the fields the old per-row update refreshed
+    stmt = sqlite_insert(Asset.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol'],
+        set_={
+            'name': stmt.excluded.name,
+            'asset_type': stmt.excluded.asset_type,
+            'is_active': stmt.excluded.is_active,
+            'last_updated': stmt.excluded.last_updated
+        }
+    )
+    sqlite_session.execute(stmt, asset_rows)
+    
+    return {row['symbol'] for row in asset_rows}
+
+
+def copy_asset(pg_session, sqlite_session, symbol, asset_copied=False):
+    """
+    Copy asset and related data from PostgreSQL to SQLite
+    
+    Args:
+        asset_copied: True if the asset row was already copied by upsert_assets
+    """
     try:
-        # Get asset from PostgreSQL
-        pg_asset = pg_session.query(Asset).filter_by(symbol=symbol).first()
-        
-        if not pg_asset:
+        if not asset_copied and not upsert_assets(pg_session, sqlite_session, [symbol]):
             logger.warning(f"  ⚠️  {symbol} not found in PostgreSQL")
             return False
         
-        # Check if already exists in SQLite
-        sqlite_asset = sqlite_session.query(Asset).filter_by(symbol=symbol).first()
+        # Copy price data, streamed from PostgreSQL in chunks so only one chunk
+        # of rows is held in memory at a time
+        price_columns = [
+            AssetPrice.symbol, AssetPrice.date, AssetPrice.open, AssetPrice.high,
+            AssetPrice.low, AssetPrice.close, AssetPrice.adjusted_close, AssetPrice.volume,
+            AssetPrice.dividend, AssetPrice.is_validated, AssetPrice.data_source,
+            AssetPrice.loaded_at
+        ]
+        price_query = select(*price_columns).where(
+            AssetPrice.symbol == symbol
+        ).order_by(AssetPrice.date).execution_options(
+            stream_results=True, yield_per=PRICE_COPY_CHUNK_SIZE
+        )
         
-        if sqlite_asset:
-            logger.debug(f"  ↻ {symbol} already in SQLite, updating...")
-            # Update existing
-            sqlite_asset.name = pg_asset.name
-            sqlite_asset.asset_type = pg_asset.asset_type
-            sqlite_asset.is_active = pg_asset.is_active
-            sqlite_asset.last_updated = datetime.utcnow()
-        else:
-            # Create new
-            sqlite_asset = Asset(
-                symbol=pg_asset.symbol,
-                code=pg_asset.code,
-                exchange=pg_asset.exchange,
-                name=pg_asset.name,
-                asset_type=pg_asset.asset_type,
-                isin=pg_asset.isin,
-                currency=pg_asset.currency,
-                country=pg_asset.country,
-                is_active=pg_asset.is_active,
-                is_in_working_db=True,
-                first_seen=pg_asset.first_seen,
-                last_updated=datetime.utcnow(),
-                last_price_date=pg_asset.last_price_date,
-                data_source=pg_asset.data_source
-            )
-            sqlite_session.add(sqlite_asset)
+        # Delete existing prices in SQLite
+        sqlite_session.query(AssetPrice).filter_by(symbol=symbol).delete()
         
-        sqlite_session.flush()
+        price_count = 0
+        keys = [c.key for c in price_columns]
+        for chunk in pg_session.execute(price_query).partitions():
+            rows = [dict(zip(keys, r)) for r in chunk]
+            sqlite_session.execute(AssetPrice.__table__.insert(), rows)
+            price_count += len(rows)
         
-        # Copy price data
-        pg_prices = pg_session.query(AssetPrice).filter_by(symbol=symbol).all()
-        
-        if pg_prices:
-            logger.info(f"  📈 {symbol}: {len(pg_prices):,} price records")
-            
-            # Delete existing prices in SQLite
-            sqlite_session.query(AssetPrice).filter_by(symbol=symbol).delete()
-            
-            # Insert new prices
-            for pg_price in pg_prices:
-                sqlite_price = AssetPrice(
-                    symbol=pg_price.symbol,
-                    date=pg_price.date,
-                    open=pg_price.open,
-                    high=pg_price.high,
-                    low=pg_price.low,
-                    close=pg_price.close,
-                    adjusted_close=pg_price.adjusted_close,
-                    volume=pg_price.volume,
-                    dividend=pg_price.dividend,
-                    is_validated=pg_price.is_validated,
-                    data_source=pg_price.data_source,
-                    loaded_at=pg_price.loaded_at
-                )
-                sqlite_session.add(sqlite_price)
-            
-            # Commit prices in batches
-            if len(pg_prices) % 500 == 0:
-                sqlite_session.commit()
+        if price_count:
+            logger.info(f"  📈 {symbol}: {price_count:,} price records")
         
         # Copy corporate actions
         pg_actions = pg_session.query(CorporateActions).filter_by(symbol=symbol).all()
@@ -257,10 +273,17 @@ def materialize_working_database(rebuild=False):
     
     with get_session(pg_engine) as pg_session:
         with get_session(sqlite_engine) as sqlite_session:
+            # All asset rows in one statement up front
+            found = upsert_assets(pg_session, sqlite_session, sorted(tickers))
+            sqlite_session.commit()
+            
             for i, symbol in enumerate(sorted(tickers), 1):
                 logger.info(f"[{i}/{len(tickers)}] {symbol}")
                 
-                if copy_asset(pg_session, sqlite_session, symbol):
+                if symbol not in found:
+                    logger.warning(f"  ⚠️  {symbol} not found in PostgreSQL")
+                    fail_count += 1
+                elif copy_asset(pg_session, sqlite_session, symbol, asset_copied=True):
                     success_count += 1
                 else:
                     fail_count += 1
@@ -4,10 +4,13 @@
 import os
 import sys
 import logging
-import json
+import hashlib
+import functools
+import threading
 import numpy as np
+import pandas as pd
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from flask import Flask, render_template, jsonify, request, g
 
 import sentry_sdk
@@ -18,6 +21,8 @@ if os.getenv('SENTRY_DSN'):
         traces_sample_rate=0.1
     )
     
+from webapp.cache import TTLCache
+
 # Auth imports
 from webapp.auth import require_auth, optional_auth, get_clerk_config
 
@@ -29,7 +34,7 @@ from webapp.stripe_integration import (
 )
 from webapp.subscription import (
     get_user_tier, get_user_tier_info, get_tier_config,
-    can_access_feature, can_use_optimization_method,
+    can_access_feature, tier_has_feature, can_use_optimization_method,
     get_max_assets, can_save_portfolio, get_pricing_data,
     require_feature, require_tier, start_trial, TRIAL_PERIOD_DAYS
 )
@@ -48,6 +53,7 @@ sys.path.append(str(PARENT_DIR))
 try:
     import config_v6
     from models_v6 import Asset, SavedPortfolio
+    from webapp.user_models import UserPortfolio
     from webapp.data_manager import data_manager
     from webapp.optimization_engine import PortfolioOptimizer
 except ImportError as e:
@@ -67,6 +73,30 @@ app = Flask(__name__)
 app.secret_key = "folio_visualizer_v6_secret"
 
 
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Release the request's scoped database sessions back to the pool."""
+    data_manager.SessionFactory.remove()
+    data_manager.ReadSessionFactory.remove()
+
+
+# Effective subscription tier per Clerk user id. Lets read-only endpoints gate
+# features without a user lookup; entries are dropped whenever a tier changes here.
+user_tier_cache = TTLCache(maxsize=1024, ttl=60)
+
+
+def get_cached_user_tier(clerk_user_id):
+    """Return the user's effective tier, hitting the database at most once a minute."""
+    from webapp.user_models import get_user_by_clerk_id
+    
+    tier = user_tier_cache.get(clerk_user_id)
+    if tier is None:
+        with data_manager._get_read_session() as session:
+            tier = get_user_tier(get_user_by_clerk_id(session, clerk_user_id))
+        user_tier_cache.set(clerk_user_id, tier)
+    return tier
+
+
 # =============================================================================
 # AGREEMENT CONFIGURATION
 # =============================================================================
@@ -402,6 +432,7 @@ def start_free_trial():
             success = start_trial(session, user)
             
             if success:
+                user_tier_cache.pop(user.clerk_user_id)
                 tier_info = get_user_tier_info(user)
                 return jsonify({
                     'message': f'🎉 Your {TRIAL_PERIOD_DAYS}-day Pro trial has started!',
@@ -455,6 +486,7 @@ def admin_set_tier():
                 user.subscription_expires_at = None
             
             session.commit()
+            user_tier_cache.pop(user.clerk_user_id)
             
             tier_info = get_user_tier_info(user)
             return jsonify({
@@ -822,8 +854,8 @@ def run_optimization():
                 with data_manager._get_sqlite_session() as session:
                     bench_port = session.query(SavedPortfolio).filter_by(id=user_benchmark_id).first()
                     if bench_port:
-                        bench_tickers = json.loads(bench_port.tickers)
-                        bench_weights_dict = json.loads(bench_port.weights)
+                        bench_tickers = bench_port.tickers
+                        bench_weights_dict = bench_port.weights
                         bench_df = data_manager.get_price_history(bench_tickers, start_date=req_start_str, end_date=end_date)
                         
                         if not bench_df.empty:
@@ -871,7 +903,9 @@ def run_optimization():
         
         if include_diversification:
             # For optimized portfolio
-            opt_weights_array = np.array([optimized['weights'].get(t, 0) / 100.0 for t in optimizer.tickers])
+            opt_pct = optimized['weights']
+            opt_weights_array = np.fromiter((opt_pct.get(t, 0) for t in optimizer.tickers),
+                                            dtype=np.float64, count=len(optimizer.tickers)) / 100.0
             opt_diversification = optimizer.calculate_diversification_metrics(opt_weights_array)
             
             # For user portfolio
@@ -992,9 +1026,9 @@ def get_portfolio(portfolio_id):
             return jsonify({
                 'id': portfolio.id,
                 'name': portfolio.name,
-                'tickers': json.loads(portfolio.tickers),
-                'weights': json.loads(portfolio.weights),
-                'constraints': json.loads(portfolio.constraints) if portfolio.constraints else {},
+                'tickers': portfolio.tickers,
+                'weights': portfolio.weights,
+                'constraints': portfolio.constraints or {},
                 'created_at': portfolio.created_at.isoformat(),
                 'updated_at': portfolio.updated_at.isoformat()
             })
@@ -1142,6 +1176,55 @@ def export_portfolio_csv():
         return jsonify({'error': str(e)}), 500
 
 
+def parse_portfolio_csv(csv_content):
+    """
+    Parse 'ticker,weight_pct,min_pct,max_pct' rows in one vectorized pass.
+    
+    Returns (tickers, weights, constraints, errors); weights and bounds are decimals.
+    """
+    lines = csv_content.strip().split('\n')
+    start_idx = 1 if lines[0].lower().startswith('ticker') else 0
+    
+    # Index rows by their 1-based line number so errors can point back at them
+    rows = pd.Series(lines[start_idx:], index=range(start_idx + 1, len(lines) + 1), dtype=object)
+    rows = rows[rows.str.strip() != '']
+    
+    parts = rows.str.split(',', expand=True).reindex(columns=range(4)).fillna('').astype(str)
+    parts = parts.apply(lambda col: col.str.strip())
+    
+    too_short = rows.str.count(',') < 1
+    weight_pct = pd.to_numeric(parts[1].replace('', '0'), errors='coerce')
+    bad_weight = ~too_short & weight_pct.isna()
+    valid = ~(too_short | bad_weight)
+    
+    errors = [
+        f'Line {i}: Need at least ticker and weight' if too_short[i]
+        else f'Line {i}: Invalid weight "{parts.at[i, 1]}"'
+        for i in rows.index[too_short | bad_weight]
+    ]
+    
+    ticker = parts[0].str.upper()
+    ticker = ticker.where(ticker.str.contains('.', regex=False), ticker + '.US')
+    
+    # Unparseable bounds are ignored, same as blank ones
+    min_pct = pd.to_numeric(parts[2], errors='coerce') / 100.0
+    max_pct = pd.to_numeric(parts[3], errors='coerce') / 100.0
+    has_bounds = valid & (min_pct.notna() | max_pct.notna())
+    
+    tickers = ticker[valid].tolist()
+    weights = dict(zip(tickers, (weight_pct[valid] / 100.0).tolist()))
+    constraints = {'assets': {
+        t: {'min': lo, 'max': hi}
+        for t, lo, hi in zip(
+            ticker[has_bounds].tolist(),
+            min_pct[has_bounds].fillna(0).tolist(),
+            max_pct[has_bounds].fillna(1).tolist()
+        )
+    }}
+    
+    return tickers, weights, constraints, errors
+
+
 @app.route('/api/portfolios/import-csv', methods=['POST'])
 @optional_auth
 def import_portfolio_csv():
@@ -1174,58 +1257,7 @@ def import_portfolio_csv():
         if not csv_content:
             return jsonify({'error': 'No CSV content provided'}), 400
         
-        lines = csv_content.strip().split('\n')
-        
-        start_idx = 1 if lines[0].lower().startswith('ticker') else 0
-        
-        tickers = []
-        weights = {}
-        constraints = {'assets': {}}
-        errors = []
-        
-        for i, line in enumerate(lines[start_idx:], start=start_idx + 1):
-            if not line.strip():
-                continue
-                
-            parts = [p.strip() for p in line.split(',')]
-            
-            if len(parts) < 2:
-                errors.append(f'Line {i}: Need at least ticker and weight')
-                continue
-            
-            ticker = parts[0].upper()
-            if '.' not in ticker:
-                ticker = f'{ticker}.US'
-            
-            try:
-                weight_pct = float(parts[1]) if parts[1] else 0
-            except ValueError:
-                errors.append(f'Line {i}: Invalid weight "{parts[1]}"')
-                continue
-            
-            tickers.append(ticker)
-            weights[ticker] = weight_pct / 100.0
-            
-            min_pct = None
-            max_pct = None
-            
-            if len(parts) > 2 and parts[2]:
-                try:
-                    min_pct = float(parts[2]) / 100.0
-                except ValueError:
-                    pass
-                    
-            if len(parts) > 3 and parts[3]:
-                try:
-                    max_pct = float(parts[3]) / 100.0
-                except ValueError:
-                    pass
-            
-            if min_pct is not None or max_pct is not None:
-                constraints['assets'][ticker] = {
-                    'min': min_pct if min_pct is not None else 0,
-                    'max': max_pct if max_pct is not None else 1
-                }
+        tickers, weights, constraints, errors = parse_portfolio_csv(csv_content)
         
         # Validate tickers exist in database
         valid_tickers = []
@@ -1256,6 +1288,28 @@ def import_portfolio_csv():
 # RANKINGS API (Public Leaderboard)
 # ============================================================================
 
+# Sortable ranking columns, with the ORDER BY expression for each (sort_by, order)
+RANKING_SORT_COLUMNS = {
+    'return': UserPortfolio.cached_return,
+    'volatility': UserPortfolio.cached_volatility,
+    'sharpe': UserPortfolio.cached_sharpe,
+    'sortino': UserPortfolio.cached_sortino,
+    'max_drawdown': UserPortfolio.cached_max_drawdown,
+    'health_score': UserPortfolio.cached_health_score,
+    'hhi': UserPortfolio.cached_hhi,
+    'diversification_ratio': UserPortfolio.cached_div_ratio
+}
+
+RANKING_ORDER_BY = {
+    **{(key, 'asc'): col.asc() for key, col in RANKING_SORT_COLUMNS.items()},
+    **{(key, 'desc'): col.desc() for key, col in RANKING_SORT_COLUMNS.items()}
+}
+
+# Short-lived cache of serialized rankings bodies, keyed by ETag (which already
+# encodes the metrics watermark and every query parameter)
+rankings_cache = TTLCache(maxsize=64, ttl=15)
+
+
 @app.route('/api/rankings')
 @optional_auth
 def get_rankings():
@@ -1263,69 +1317,95 @@ def get_rankings():
     Get public portfolio rankings.
     
     Query params:
-        sort_by: return, sharpe, sortino, health_score, volatility (default: sharpe)
+        sort_by: return, volatility, sharpe, sortino, max_drawdown, health_score,
+                 hhi, diversification_ratio (default: sharpe)
         order: desc, asc (default: desc)
         limit: 1-100 (default: 50)
     """
-    from webapp.user_models import UserPortfolio, User, get_user_by_clerk_id
+    from webapp.user_models import User
     
     sort_by = request.args.get('sort_by', 'sharpe')
-    order = request.args.get('order', 'desc')
+    order = 'asc' if request.args.get('order', 'desc') == 'asc' else 'desc'
     limit = min(int(request.args.get('limit', 50)), 100)
     
-    # Map sort_by to column
-    sort_columns = {
-        'return': UserPortfolio.cached_return,
-        'volatility': UserPortfolio.cached_volatility,
-        'sharpe': UserPortfolio.cached_sharpe,
-        'sortino': UserPortfolio.cached_sortino,
-        'max_drawdown': UserPortfolio.cached_max_drawdown,
-        'health_score': UserPortfolio.cached_health_score,
-        'hhi': UserPortfolio.cached_hhi,
-        'diversification_ratio': UserPortfolio.cached_div_ratio
-    }
+    if sort_by not in RANKING_SORT_COLUMNS:
+        return jsonify({
+            'error': f'Invalid sort_by: {sort_by}',
+            'valid_sort_by': list(RANKING_SORT_COLUMNS)
+        }), 400
     
-    sort_col = sort_columns.get(sort_by, UserPortfolio.cached_sharpe)
+    order_by = RANKING_ORDER_BY[(sort_by, order)]
     
     # Check if requester can view allocations (Pro only)
     show_allocations = False
     if g.user_id:
         try:
-            with data_manager._get_session() as session:
-                user = get_user_by_clerk_id(session, g.user_id)
-                if user and can_access_feature(user, 'view_others_allocations'):
-                    show_allocations = True
+            show_allocations = tier_has_feature(get_cached_user_tier(g.user_id), 'view_others_allocations')
         except:
             pass
     
     try:
-        with data_manager._get_session() as session:
-            query = session.query(UserPortfolio).join(User).filter(
-                UserPortfolio.is_public == True,
-                UserPortfolio.cached_sharpe.isnot(None)  # Must have cached metrics
-            )
-            
-            if order == 'asc':
-                query = query.order_by(sort_col.asc())
-            else:
-                query = query.order_by(sort_col.desc())
-            
-            portfolios = query.limit(limit).all()
-            
-            results = []
-            for i, portfolio in enumerate(portfolios, 1):
-                results.append(portfolio.to_ranking_dict(
-                    rank=i, 
-                    show_allocations=show_allocations
-                ))
-            
-            return jsonify({
-                'rankings': results,
-                'sort_by': sort_by,
-                'order': order,
-                'count': len(results),
-                'can_view_allocations': show_allocations
-            })
+        with data_manager._get_read_session() as session:
+            # Answer repeat requests with 304 while nothing shown in the rankings has changed:
+            # portfolio edits (name, holdings, visibility) and metric refreshes both bump the
+            # row's updated_at, and owner renames bump users.updated_at
+            from sqlalchemy import func
+            from sqlalchemy.orm import joinedload
+            max_updated, max_metrics, max_user_updated, public_count = session.query(
+                func.max(UserPortfolio.updated_at),
+                func.max(UserPortfolio.metrics_updated_at),
+                func.max(User.updated_at),
+                func.count(UserPortfolio.id)
+            ).join(User, UserPortfolio.user_id == User.id).filter(UserPortfolio.is_public == True).one()
+            
+            etag = hashlib.blake2b(
+                f'{max_updated}|{max_metrics}|{max_user_updated}|{public_count}|'
+                f'{sort_by}|{order}|{limit}|{show_allocations}'.encode(),
+                digest_size=16
+            ).hexdigest()
+            cache_control = 'private, max-age=30' if show_allocations else 'public, max-age=30'
+            
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control
+                response.headers['Vary'] = 'Authorization'
+                return response
+            
+            body = rankings_cache.get(etag)
+            if body is None:
+                # to_ranking_dict reads portfolio.user.username: eager-load just that
+                # column in the same query instead of one lazy load per row
+                query = session.query(UserPortfolio).options(
+                    joinedload(UserPortfolio.user, innerjoin=True).load_only(User.username)
+                ).filter(
+                    UserPortfolio.is_public == True,
+                    UserPortfolio.cached_sharpe.isnot(None)  # Must have cached metrics
+                )
+                
+                portfolios = query.order_by(order_by).limit(limit).all()
+                
+                results = []
+                for i, portfolio in enumerate(portfolios, 1):
+                    results.append(portfolio.to_ranking_dict(
+                        rank=i, 
+                        show_allocations=show_allocations
+                    ))
+                
+                body = jsonify({
+                    'rankings': results,
+                    'sort_by': sort_by,
+                    'order': order,
+                    'count': len(results),
+                    'can_view_allocations': show_allocations
+                }).get_data()
+                rankings_cache.set(etag, body)
+            
+            response = app.response_class(body, mimetype='application/json')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            response.headers['Vary'] = 'Authorization'
+            return response
             
     except Exception as e:
         logger.error(f"Rankings error: {e}")
@@ -1336,24 +1416,22 @@ def get_rankings():
 @require_auth
 def get_user_portfolios():
     """Get all portfolios for the authenticated user"""
-    from webapp.user_models import get_user_by_clerk_id, UserPortfolio
+    from webapp.user_models import get_user_by_clerk_id, get_user_portfolio_dicts
     
     try:
-        with data_manager._get_session() as session:
+        with data_manager._get_read_session() as session:
             user = get_user_by_clerk_id(session, g.user_id)
             
             if not user:
                 return jsonify({'portfolios': []})
             
-            portfolios = session.query(UserPortfolio).filter_by(
-                user_id=user.id
-            ).order_by(UserPortfolio.updated_at.desc()).all()
+            portfolios = get_user_portfolio_dicts(session, user.id)
             
             # Get tier info for limits
             tier_config = get_tier_config(get_user_tier(user))
             
             return jsonify({
-                'portfolios': [p.to_dict(include_allocations=True) for p in portfolios],
+                'portfolios': portfolios,
                 'count': len(portfolios),
                 'max_portfolios': tier_config['max_portfolios']
             })
@@ -1475,6 +1553,26 @@ def delete_user_portfolio(portfolio_id):
         logger.error(f"Delete portfolio error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@functools.lru_cache(maxsize=128)
+def _cached_spy_benchmark_stats(start_date, end_date, as_of):
+    df = data_manager.get_price_history(['SPY.US'], start_date=start_date, end_date=end_date)
+    if df.empty:
+        # Raising keeps the miss out of the cache: an empty frame may be a transient DB error
+        raise LookupError('No SPY.US prices for the requested range')
+    return PortfolioOptimizer(df).calculate_portfolio_stats(np.array([1.0]))
+
+
+def get_spy_benchmark_stats(start_date, end_date, as_of):
+    """
+    SPY benchmark stats for a date range, cached per process (successful lookups only).
+    as_of (today's date) is part of the key so open-ended ranges pick up new prices daily.
+    """
+    try:
+        return _cached_spy_benchmark_stats(start_date, end_date, as_of)
+    except LookupError:
+        return None
+
+
 @app.route('/api/compare-portfolios', methods=['POST'])
 def compare_portfolios():
     """Compare multiple saved portfolios and/or benchmarks"""
@@ -1492,11 +1590,9 @@ def compare_portfolios():
         for pid in portfolio_ids:
             # Handle SPY benchmark
             if pid == 'SPY.US':
-                df = data_manager.get_price_history(['SPY.US'], start_date=start_date, end_date=end_date)
-                if not df.empty:
-                    optimizer = PortfolioOptimizer(df)
-                    weights = np.array([1.0])
-                    stats = optimizer.calculate_portfolio_stats(weights)
+                spy_stats = get_spy_benchmark_stats(start_date, end_date, date.today())
+                if spy_stats:
+                    stats = dict(spy_stats)  # Cached dict is shared; don't mutate it
                     stats['name'] = 'S&P 500 (SPY)'
                     results.append(stats)
                 continue
@@ -1507,8 +1603,8 @@ def compare_portfolios():
                 if not portfolio:
                     continue
                 
-                tickers = json.loads(portfolio.tickers)
-                weights_dict = json.loads(portfolio.weights)
+                tickers = portfolio.tickers
+                weights_dict = portfolio.weights
                 
                 df = data_manager.get_price_history(tickers, start_date=start_date, end_date=end_date)
                 if df.empty:
@@ -1535,6 +1631,7 @@ def admin_data_status():
     """
     Get data freshness statistics.
     Shows how many tickers need updates.
+    total_price_records is an estimate unless called with ?exact=1.
     """
     from webapp.data_updater import get_update_statistics, background_updater
     
@@ -1544,7 +1641,8 @@ def admin_data_status():
         return jsonify({'error': 'Admin access required'}), 403
     
     try:
-        stats = get_update_statistics()
+        # ?exact=1 counts price rows instead of using the planner estimate
+        stats = get_update_statistics(exact=request.args.get('exact') == '1')
         updater_status = background_updater.get_status()
         
         return jsonify({
@@ -1680,6 +1778,10 @@ if os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('DATABASE_URL', '').s
         logger.info("Background data updater started automatically")
     except Exception as e:
         logger.error(f"Failed to start background updater: {e}")
+    # Saved portfolios are read as JSON, so legacy TEXT columns must be converted first
+    data_manager.ensure_saved_portfolio_json_columns()
+    # Build missing price indexes in the background so startup isn't blocked
+    threading.Thread(target=data_manager.ensure_price_indexes, daemon=True).start()
 
 # =============================================================================
 # STRIPE PAYMENT ROUTES
@@ -1836,6 +1938,7 @@ def handle_checkout_completed(session):
                 user.stripe_subscription_id = subscription_id
                 user.subscription_expires_at = None  # Managed by Stripe
                 db_session.commit()
+                user_tier_cache.pop(user.clerk_user_id)
                 logger.info(f"Activated {tier} subscription for user {user_id}")
             else:
                 logger.error(f"User not found: {user_id}")
@@ -1874,6 +1977,7 @@ def handle_subscription_updated(subscription):
                     logger.info(f"Subscription cancelled for customer {customer_id}")
                 
                 db_session.commit()
+                user_tier_cache.pop(user.clerk_user_id)
                 
     except Exception as e:
         logger.error(f"Error handling subscription update: {e}")
@@ -1893,6 +1997,7 @@ def handle_subscription_deleted(subscription):
                 user.subscription_tier = 'free'
                 user.stripe_subscription_id = None
                 db_session.commit()
+                user_tier_cache.pop(user.clerk_user_id)
                 logger.info(f"Subscription deleted, reverted to free for customer {customer_id}")
                 
     except Exception as e:
@@ -6,6 +6,7 @@ import os
 import logging
 import requests
 import jwt
+from requests.adapters import HTTPAdapter
 from functools import wraps
 from flask import request, jsonify, g
 from jwt import PyJWKClient
@@ -20,6 +21,14 @@ CLERK_SECRET_KEY = os.getenv('CLERK_SECRET_KEY', '')
 # JWKS URL for verifying tokens
 CLERK_JWKS_URL = f"{CLERK_FRONTEND_API}/.well-known/jwks.json"
 
+# Pooled HTTP session for the Clerk Backend API (reuses TLS connections)
+_clerk_http = requests.Session()
+_clerk_http.headers.update({
+    "Authorization": f"Bearer {CLERK_SECRET_KEY}",
+    "Content-Type": "application/json"
+})
+_clerk_http.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+
 # Cache the JWKS client
 _jwks_client = None
 
@@ -81,12 +90,8 @@ def get_user_from_clerk(user_id):
         return None
     
     try:
-        response = requests.get(
+        response = _clerk_http.get(
             f"https://api.clerk.com/v1/users/{user_id}",
-            headers={
-                "Authorization": f"Bearer {CLERK_SECRET_KEY}",
-                "Content-Type": "application/json"
-            },
             timeout=10
         )
         
@@ -0,0 +1,51 @@
+# webapp/cache.py
+# PURPOSE: Small thread-safe in-process TTL cache shared by the web app modules
+
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Bounded dict cache whose entries expire after `ttl` seconds.
+    When full, the oldest entry is evicted first.
+    """
+
+    def __init__(self, maxsize=128, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value, or default if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the oldest entries when full."""
+        with self._lock:
+            self._data.pop(key, None)
+            while len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[key] = (value, time.monotonic())
+
+    def pop(self, key, default=None):
+        """Remove an entry (e.g. after the underlying data changed)."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -3,48 +3,167 @@
 # All data (prices, assets, saved portfolios) stored in PostgreSQL
 
 import os
+import numpy as np
 import pandas as pd
 import logging
-from datetime import datetime
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from types import MappingProxyType
+from datetime import date, datetime
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from webapp.cache import TTLCache
 
 # Import project config - use production config in cloud environments
 if os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('RAILWAY_ENVIRONMENT_NAME') or os.getenv('PRODUCTION'):
     import config_production as config_v6
 else:
     import config_v6
-from models_v6 import Asset, AssetPrice, Base, SavedPortfolio
+from models_v6 import Asset, AssetPrice, Base, SavedPortfolio, SAVED_PORTFOLIOS_JSONB_MIGRATION_SQL
 
 # Setup Logging
 logger = logging.getLogger("DataManager")
 
+
+# Asset Type to Portfolio Group Mapping
+ASSET_TYPE_TO_GROUP = MappingProxyType({
+    'Common Stock': 'Equities',
+    'Preferred Stock': 'Equities',
+    'ETF': 'Funds',
+    'FUND': 'Funds',
+    'INDEX': 'Funds',
+    'Closed-End Fund': 'Funds',
+    'BOND': 'Fixed Income',
+    'REIT': 'Real Estate',
+    'Unit': 'Other',
+    'Right': 'Other',
+    'Warrant': 'Other',
+})
+
+
+# Lets get_price_history run as an index-only scan (no heap fetch per price row)
+PRICE_COVERING_INDEX = 'idx_asset_prices_symbol_date_ac'
+PRICE_COVERING_INDEX_SQL = f"""
+CREATE INDEX CONCURRENTLY IF NOT EXISTS {PRICE_COVERING_INDEX}
+    ON asset_prices (symbol, date) INCLUDE (adjusted_close)
+"""
+
+
+def _ffill_and_trim(values):
+    """
+    Forward-fills NaNs down each column of a (dates x symbols) array and drops
+    the leading rows that still have gaps. Same result as .ffill().dropna().
+    Returns (filled_values, first_complete_row).
+    """
+    n_rows, n_cols = values.shape
+    # Row index of the last valid value at or above each cell
+    idx = np.where(~np.isnan(values), np.arange(n_rows)[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = values[idx, np.arange(n_cols)]
+
+    # After ffill only leading rows can contain NaN
+    complete = ~np.isnan(filled).any(axis=1)
+    first = int(complete.argmax()) if complete.any() else n_rows
+    return filled[first:], first
+
 class DataManager:
-    # Asset Type to Portfolio Group Mapping
-    ASSET_TYPE_TO_GROUP = {
-        'Common Stock': 'Equities',
-        'Preferred Stock': 'Equities',
-        'ETF': 'Funds',
-        'FUND': 'Funds',
-        'INDEX': 'Funds',
-        'Closed-End Fund': 'Funds',
-        'BOND': 'Fixed Income',
-        'REIT': 'Real Estate',
-        'Unit': 'Other',
-        'Right': 'Other',
-        'Warrant': 'Other',
-    }
+    # Asset Type to Portfolio Group Mapping (read-only, shared)
+    ASSET_TYPE_TO_GROUP = ASSET_TYPE_TO_GROUP
+
+    # PostgreSQL allows at most 1664 entries in a SELECT list; above this many
+    # tickers get_price_history pivots client-side instead of in the query
+    MAX_PIVOT_COLUMNS = 1000
+
+    # Prices/metadata only change on a batch update (see clear_caches)
+    CACHE_TTL_SECONDS = 300
     
     def __init__(self):
         # Single PostgreSQL connection
         self.engine = config_v6.get_postgres_engine()
         # Alias for backward compatibility with app.py
         self.pg_engine = self.engine
+        # One session per thread (i.e. per request), released by app teardown
+        self.SessionFactory = scoped_session(
+            sessionmaker(bind=self.engine, expire_on_commit=False)
+        )
+        # Autocommit sessions for read-only handlers: no BEGIN/ROLLBACK round-trips.
+        # Shares the main engine's connection pool.
+        self.read_engine = self.engine.execution_options(isolation_level='AUTOCOMMIT')
+        self.ReadSessionFactory = scoped_session(
+            sessionmaker(bind=self.read_engine, expire_on_commit=False)
+        )
+        # Result caches keyed by the sorted ticker tuple
+        self.coverage_cache = TTLCache(maxsize=256, ttl=self.CACHE_TTL_SECONDS)
+        self.metadata_cache = TTLCache(maxsize=256, ttl=self.CACHE_TTL_SECONDS)
+        self.price_cache = TTLCache(maxsize=32, ttl=self.CACHE_TTL_SECONDS)
         logger.info("DataManager initialized with PostgreSQL")
 
     def _get_session(self):
-        """Get a PostgreSQL session"""
-        return Session(self.engine)
+        """Get the current thread's PostgreSQL session"""
+        return self.SessionFactory()
+
+    def _get_read_session(self):
+        """Get the current thread's autocommit session (never use it for writes)"""
+        return self.ReadSessionFactory()
+    
+    def ensure_price_indexes(self):
+        """
+        Creates the covering price index on PostgreSQL if it is missing.
+        CONCURRENTLY avoids locking writers, but it can take a while on a large
+        table, so call this off the request path.
+        """
+        if self.engine.dialect.name != 'postgresql':
+            return
+        
+        try:
+            # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+            with self.read_engine.connect() as conn:
+                existing = conn.execute(
+                    text("SELECT i.indisvalid FROM pg_index i "
+                         "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+                    {'name': PRICE_COVERING_INDEX}
+                ).first()
+                if existing is not None:
+                    if existing[0]:
+                        return
+                    # An interrupted concurrent build leaves an INVALID index behind under
+                    # the same name; IF NOT EXISTS would keep it forever, so rebuild
+                    logger.warning(f"Index {PRICE_COVERING_INDEX} is invalid, rebuilding")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {PRICE_COVERING_INDEX}"))
+                logger.info(f"Creating index {PRICE_COVERING_INDEX}...")
+                conn.execute(text(PRICE_COVERING_INDEX_SQL))
+                logger.info(f"Index {PRICE_COVERING_INDEX} created")
+        except Exception as e:
+            logger.error(f"Error creating price index: {e}")
+
+    def ensure_saved_portfolio_json_columns(self):
+        """
+        Converts saved_portfolios' tickers/weights/constraints from legacy TEXT to JSONB.
+        The model reads these columns as JSON, so run this before serving requests.
+        """
+        if self.engine.dialect.name != 'postgresql':
+            return
+        
+        try:
+            with self.engine.begin() as conn:
+                legacy = conn.execute(
+                    text("SELECT 1 FROM information_schema.columns "
+                         "WHERE table_name = 'saved_portfolios' "
+                         "AND column_name IN ('tickers', 'weights', 'constraints') "
+                         "AND data_type = 'text'")
+                ).first()
+                if not legacy:
+                    return
+                logger.info("Converting saved_portfolios JSON columns from TEXT to JSONB...")
+                conn.execute(text(SAVED_PORTFOLIOS_JSONB_MIGRATION_SQL))
+                logger.info("saved_portfolios JSON columns converted")
+        except Exception as e:
+            logger.error(f"Error converting saved_portfolios columns: {e}")
+
+    def clear_caches(self):
+        """Drop cached query results (call after prices/assets change)"""
+        self.coverage_cache.clear()
+        self.metadata_cache.clear()
+        self.price_cache.clear()
     
     # Backward compatibility aliases
     def _get_postgres_session(self):
@@ -58,17 +177,29 @@ class DataManager:
         """
         Returns the min/max date for each ticker.
         """
+        cache_key = tuple(sorted(set(tickers)))
+        cached = self.coverage_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         coverage = {}
         
         try:
+            # Per-symbol MIN/MAX subqueries are answered from the tips of the
+            # (symbol, date) index instead of aggregating every price row
+            first_date = select(func.min(AssetPrice.date)).where(
+                AssetPrice.symbol == Asset.symbol
+            ).scalar_subquery()
+            last_date = select(func.max(AssetPrice.date)).where(
+                AssetPrice.symbol == Asset.symbol
+            ).scalar_subquery()
+            
             with self._get_session() as session:
-                results = session.query(
-                    AssetPrice.symbol,
-                    func.min(AssetPrice.date),
-                    func.max(AssetPrice.date)
-                ).filter(
-                    AssetPrice.symbol.in_(tickers)
-                ).group_by(AssetPrice.symbol).all()
+                results = session.execute(
+                    select(Asset.symbol, first_date, last_date).where(
+                        Asset.symbol.in_(tickers)
+                    )
+                ).all()
                 
                 for row in results:
                     sym, min_val, max_val = row
@@ -77,6 +208,7 @@ class DataManager:
                     
                     if start_date and end_date:
                         coverage[sym] = {'start': start_date, 'end': end_date}
+            self.coverage_cache.set(cache_key, coverage)
         except Exception as e:
             logger.error(f"Error getting ticker coverage: {e}")
                     
@@ -84,15 +216,18 @@ class DataManager:
 
     def _parse_date(self, val):
         """Helper to safely ensure we have a python date object"""
-        if val is None: 
+        # Exact type checks first: DATE columns come back as plain dates
+        if val is None:
             return None
-        if hasattr(val, 'date'): 
+        if type(val) is date:
+            return val
+        if isinstance(val, datetime):
             return val.date()
         if isinstance(val, str):
-            try: 
+            try:
                 return datetime.strptime(val[:10], '%Y-%m-%d').date()
-            except: 
-                pass
+            except ValueError:
+                return None
         return val
 
     def get_price_history(self, tickers, start_date=None, end_date=None):
@@ -103,36 +238,89 @@ class DataManager:
         if not tickers:
             return pd.DataFrame()
         
+        symbols = sorted(set(tickers))
+        cache_key = (tuple(symbols), str(start_date or ''), str(end_date or ''))
+        cached = self.price_cache.get(cache_key)
+        if cached is not None:
+            # Callers are free to modify the frame they get back
+            return cached.copy()
+        
+        pivot_in_db = len(symbols) <= self.MAX_PIVOT_COLUMNS
+        
+        if pivot_in_db:
+            # One column per ticker, pivoted server-side with MAX(...) FILTER (WHERE ...)
+            # so the wire carries one row per date instead of one per (date, ticker)
+            value_columns = [
+                func.max(AssetPrice.adjusted_close).filter(AssetPrice.symbol == sym).label(sym)
+                for sym in symbols
+            ]
+        else:
+            # Too many tickers for one SELECT list: fetch long rows and pivot here
+            value_columns = [AssetPrice.symbol, AssetPrice.adjusted_close]
+
+        stmt = select(
+            AssetPrice.date,
+            *value_columns
+        ).where(
+            AssetPrice.symbol.in_(symbols)
+        )
+        
+        if start_date:
+            stmt = stmt.where(AssetPrice.date >= start_date)
+        if end_date:
+            stmt = stmt.where(AssetPrice.date <= end_date)
+        
+        if pivot_in_db:
+            stmt = stmt.group_by(AssetPrice.date)
+        stmt = stmt.order_by(AssetPrice.date)
+
         try:
-            with self._get_session() as session:
-                query = session.query(
-                    AssetPrice.date, 
-                    AssetPrice.symbol, 
-                    AssetPrice.adjusted_close
-                ).filter(
-                    AssetPrice.symbol.in_(tickers)
-                )
-                
-                if start_date:
-                    query = query.filter(AssetPrice.date >= start_date)
-                if end_date:
-                    query = query.filter(AssetPrice.date <= end_date)
-                
-                query = query.order_by(AssetPrice.date)
-                
-                data = query.all()
-                
-                if not data:
-                    logger.warning(f"No price data found for tickers: {tickers}")
-                    return pd.DataFrame()
-
-                df = pd.DataFrame(data, columns=['date', 'symbol', 'adjusted_close'])
-                pivot_df = df.pivot(index='date', columns='symbol', values='adjusted_close')
-                pivot_df.fillna(method='ffill', inplace=True)
-                pivot_df.dropna(inplace=True)
-                
-                return pivot_df
-                
+            # Core select on a plain autocommit connection: no ORM rows, no BEGIN/ROLLBACK
+            with self.read_engine.connect() as conn:
+                if pivot_in_db:
+                    df = pd.read_sql_query(
+                        stmt,
+                        conn,
+                        index_col='date',
+                        parse_dates=['date']
+                    )
+                    no_data = df.empty
+                else:
+                    rows = conn.execute(stmt).all()
+                    no_data = not rows
+
+            if no_data:
+                logger.warning(f"No price data found for tickers: {tickers}")
+                return pd.DataFrame()
+
+            if pivot_in_db:
+                # Tickers with no rows come back as all-NaN columns; drop them
+                # before trimming so they don't wipe out every date
+                df = df.dropna(axis=1, how='all')
+                dates = df.index
+                syms = df.columns
+                values = df.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                # Scatter the long rows straight into a dense (dates x symbols) matrix;
+                # (symbol, date) is unique so no aggregation is needed. Only the
+                # unique dates get converted to datetime64, not every row's.
+                date_col, sym_col, close_col = zip(*rows)
+                date_codes, dates = pd.factorize(np.array(date_col, dtype=object), sort=True)
+                sym_codes, syms = pd.factorize(np.array(sym_col, dtype=object), sort=True)
+                values = np.full((len(dates), len(syms)), np.nan)
+                values[date_codes, sym_codes] = np.array(close_col, dtype=float)
+                dates = pd.to_datetime(dates)
+
+            values, first = _ffill_and_trim(values)
+            pivot_df = pd.DataFrame(
+                values,
+                index=pd.DatetimeIndex(dates[first:], name='date'),
+                columns=pd.Index(syms, name='symbol')
+            )
+            
+            self.price_cache.set(cache_key, pivot_df)
+            return pivot_df.copy()
+            
         except Exception as e:
             logger.error(f"Error getting price history: {e}")
             return pd.DataFrame()
@@ -141,27 +329,65 @@ class DataManager:
         """
         Returns asset metadata including group classification.
         """
+        cache_key = tuple(sorted(set(tickers)))
+        cached = self.metadata_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         metadata = {}
         
         try:
             with self._get_session() as session:
-                assets = session.query(Asset).filter(Asset.symbol.in_(tickers)).all()
-                
-                for asset in assets:
-                    group = self.ASSET_TYPE_TO_GROUP.get(asset.asset_type, 'Other')
-                    
-                    metadata[asset.symbol] = {
-                        'name': asset.name or asset.symbol,
-                        'asset_type': asset.asset_type,
-                        'group': group,
-                        'exchange': asset.exchange,
-                        'currency': asset.currency
-                    }
+                assets = session.execute(
+                    select(
+                        Asset.symbol, Asset.name, Asset.asset_type,
+                        Asset.exchange, Asset.currency
+                    ).where(Asset.symbol.in_(tickers))
+                ).all()
+            
+            group_get = ASSET_TYPE_TO_GROUP.get
+            metadata = {
+                a.symbol: {
+                    'name': a.name or a.symbol,
+                    'asset_type': a.asset_type,
+                    'group': group_get(a.asset_type, 'Other'),
+                    'exchange': a.exchange,
+                    'currency': a.currency
+                }
+                for a in assets
+            }
+            self.metadata_cache.set(cache_key, metadata)
         except Exception as e:
             logger.error(f"Error getting asset metadata: {e}")
         
         return metadata
 
+    def save_portfolios_bulk(self, portfolios):
+        """
+        Inserts many saved portfolios in a single executemany round-trip.
+        Each item is a dict with 'name', 'tickers', 'weights' and optional 'constraints'.
+        Returns the number of rows inserted.
+        """
+        if not portfolios:
+            return 0
+
+        rows = [{
+            'name': p['name'],
+            'tickers': p['tickers'],
+            'weights': p['weights'],
+            'constraints': p.get('constraints') or None
+        } for p in portfolios]
+
+        try:
+            with self._get_session() as session:
+                session.execute(insert(SavedPortfolio), rows)
+                session.commit()
+        except Exception as e:
+            logger.error(f"Error bulk saving portfolios: {e}")
+            return 0
+
+        return len(rows)
+
     # =========================================================================
     # CACHE COMPATIBILITY - These methods now just validate tickers exist
     # =========================================================================
@@ -174,10 +400,10 @@ class DataManager:
         valid_tickers = []
         try:
             with self._get_session() as session:
-                existing = session.query(Asset.symbol).filter(
-                    Asset.symbol.in_(tickers)
-                ).all()
-                valid_tickers = [r[0] for r in existing]
+                existing = set(session.execute(
+                    select(Asset.symbol).where(Asset.symbol.in_(tickers))
+                ).scalars())
+                valid_tickers = [t for t in dict.fromkeys(tickers) if t in existing]
         except Exception as e:
             logger.error(f"Error validating tickers: {e}")
         
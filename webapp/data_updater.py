@@ -3,16 +3,25 @@
 # Designed for: 500 tickers (testing) scaling to 167K (production)
 
 import os
+import sys
 import logging
 import requests
 import threading
 import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 from typing import List, Tuple, Optional, Dict
 from contextlib import contextmanager
 
-from sqlalchemy import func, and_, create_engine, text
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import func, and_, bindparam, create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from psycopg2.extras import execute_values
+
+from webapp.cache import TTLCache
 
 logger = logging.getLogger("DataUpdater")
 
@@ -24,32 +33,110 @@ logger = logging.getLogger("DataUpdater")
 EODHD_API_TOKEN = os.environ.get('EODHD_API_TOKEN')
 EODHD_BASE_URL = "https://eodhd.com/api"
 
+# Pooled HTTP session for EODHD (reuses TLS connections across fetch threads).
+# Throttling/5xx responses are retried with backoff; the final response is
+# still returned so callers can map its status code.
+_eodhd_http = requests.Session()
+_eodhd_http.headers.update({
+    "Accept-Encoding": "gzip",
+    "User-Agent": "eodhd-updater/1.0"
+})
+_eodhd_http.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
 # Update Settings
 STALE_DATA_DAYS = 7           # Data older than this needs refresh
 BATCH_SIZE = 100              # Tickers per batch (conservative for Railway)
-API_RATE_LIMIT_DELAY = 0.5    # Seconds between API calls
+API_RATE_LIMIT_DELAY = 0.5    # Seconds between API calls (serial updates)
+API_MAX_WORKERS = 8           # Concurrent EODHD fetches in batch updates
+API_MAX_CALLS_PER_SECOND = 8  # Request rate across all fetch threads
 MAX_DAILY_UPDATES = 5000      # Max tickers to update per day (stay under API limits)
+BULK_MAX_GAP_DAYS = 14        # Tickers at most this far behind are refreshed via bulk calls
+BULK_CALL_COST = 100          # API credits one bulk (whole-exchange) call consumes
 
 # Background update settings
 UPDATE_INTERVAL_HOURS = 6     # How often to check for updates
 UPDATE_ENABLED = True         # Master switch
 
 
+# Bulk upsert used by update_single_ticker (rows are expanded by execute_values)
+UPSERT_PRICES_SQL = """
+    INSERT INTO asset_prices
+    (symbol, date, open, high, low, close, adjusted_close, volume,
+     data_source, is_validated, loaded_at)
+    VALUES %s
+    ON CONFLICT (symbol, date) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        adjusted_close = EXCLUDED.adjusted_close,
+        volume = EXCLUDED.volume,
+        loaded_at = NOW()
+    RETURNING (xmax = 0)
+"""
+UPSERT_PRICES_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, 'EODHD', true, NOW())"
+
+
 # ============================================================================
 # DATABASE HELPERS
 # ============================================================================
 
 def get_database_url():
     """Get database URL from environment"""
-    return os.environ.get('DATABASE_URL')
+    url = os.environ.get('DATABASE_URL')
+    # Railway/Heroku still hand out postgres:// which SQLAlchemy no longer accepts
+    if url and url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def _loaded_app_engine(url):
+    """The web app's DataManager engine, if it's already loaded and uses the same database"""
+    manager = getattr(sys.modules.get('webapp.data_manager'), 'data_manager', None)
+    if manager is None or not url:
+        return None
+    return manager.engine if manager.engine.url == make_url(url) else None
+
+
+def get_db_engine():
+    """
+    Get the shared engine, created on first use (DATABASE_URL may be set after import).
+    Inside the web app this is DataManager's engine, so there is one pool per process.
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = get_database_url()
+                _engine = _loaded_app_engine(url) or create_engine(
+                    url,
+                    pool_size=5,
+                    max_overflow=10,
+                    pool_pre_ping=True
+                )
+                _session_factory = sessionmaker(bind=_engine, expire_on_commit=False)
+    return _engine
 
 
 @contextmanager
 def get_db_session():
-    """Create a database session"""
-    engine = create_engine(get_database_url())
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    """Create a database session on the shared connection pool"""
+    get_db_engine()
+    session = _session_factory()
     try:
         yield session
         session.commit()
@@ -61,6 +148,70 @@ def get_db_session():
         session.close()
 
 
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class RateLimiter:
+    """
+    Spaces out call starts across threads to at most `rate` per second.
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+    
+    def wait(self):
+        """Block until the caller may issue its next request"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+api_rate_limiter = RateLimiter(API_MAX_CALLS_PER_SECOND)
+
+# Monotonic timestamps of ticker updates in the last 24h (MAX_DAILY_UPDATES window)
+_daily_update_times = deque()
+_daily_update_lock = threading.Lock()
+
+
+def reserve_daily_updates(requested: int, partial: bool = True) -> int:
+    """
+    Claim up to `requested` ticker updates from the rolling 24h budget
+    (all of them or none if partial=False).
+    
+    Returns how many were granted.
+    """
+    now = time.monotonic()
+    cutoff = now - 24 * 3600
+    with _daily_update_lock:
+        while _daily_update_times and _daily_update_times[0] < cutoff:
+            _daily_update_times.popleft()
+        granted = max(0, min(requested, MAX_DAILY_UPDATES - len(_daily_update_times)))
+        if not partial and granted < requested:
+            granted = 0
+        _daily_update_times.extend([now] * granted)
+    return granted
+
+
+# get_update_statistics results (estimated/exact), reused for a minute across status page refreshes
+_statistics_cache = TTLCache(maxsize=2, ttl=60)
+
+
+def invalidate_data_caches():
+    """Drop the web app's cached price/coverage/metadata after new prices land"""
+    _statistics_cache.clear()
+    try:
+        from webapp.data_manager import data_manager
+        data_manager.clear_caches()
+    except Exception as e:
+        logger.warning(f"Could not clear data caches: {e}")
+
+
 # ============================================================================
 # EODHD API FUNCTIONS
 # ============================================================================
@@ -96,7 +247,7 @@ def fetch_ticker_prices(symbol: str, from_date: str, to_date: str) -> Tuple[Opti
             'period': 'd'
         }
         
-        response = requests.get(url, params=params, timeout=30)
+        response = _eodhd_http.get(url, params=params, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -119,6 +270,53 @@ def fetch_ticker_prices(symbol: str, from_date: str, to_date: str) -> Tuple[Opti
         return None, 'error'
 
 
+def fetch_bulk_eod(exchange: str, date_str: str) -> Tuple[Optional[Dict[str, Dict]], str]:
+    """
+    Fetch one day of prices for every ticker on an exchange in a single call.
+    
+    Args:
+        exchange: Exchange code (e.g., 'US')
+        date_str: Trading date (YYYY-MM-DD)
+        
+    Returns:
+        Tuple of (records_by_symbol, status) with the same statuses as
+        fetch_ticker_prices. Symbols are keyed as 'CODE.EXCHANGE'.
+    """
+    if not EODHD_API_TOKEN:
+        logger.error("EODHD_API_TOKEN not configured!")
+        return None, 'error'
+    
+    try:
+        url = f"{EODHD_BASE_URL}/eod-bulk-last-day/{exchange}"
+        params = {
+            'api_token': EODHD_API_TOKEN,
+            'date': date_str,
+            'fmt': 'json'
+        }
+        
+        response = _eodhd_http.get(url, params=params, timeout=60)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if isinstance(data, list) and len(data) > 0:
+                return {f"{r.get('code')}.{exchange}": r for r in data}, 'ok'
+            return None, 'no_data'
+        elif response.status_code == 402:
+            return None, 'paywall'
+        elif response.status_code == 404:
+            return None, 'not_found'
+        else:
+            logger.warning(f"Bulk API returned {response.status_code} for {exchange} {date_str}")
+            return None, 'error'
+            
+    except requests.Timeout:
+        logger.warning(f"Timeout fetching bulk {exchange} {date_str}")
+        return None, 'error'
+    except Exception as e:
+        logger.error(f"Error fetching bulk {exchange} {date_str}: {e}")
+        return None, 'error'
+
+
 # ============================================================================
 # UPDATE FUNCTIONS
 # ============================================================================
@@ -149,133 +347,286 @@ def get_stale_tickers(limit: int = BATCH_SIZE) -> List[Dict]:
         return [{'symbol': row[0], 'latest_date': row[1]} for row in result]
 
 
-def get_update_statistics() -> Dict:
-    """Get current data freshness statistics"""
+def get_bulk_candidates(through: date) -> List[Dict]:
+    """
+    Get exchange-listed tickers missing prices up to `through` but at most
+    BULK_MAX_GAP_DAYS behind, regardless of STALE_DATA_DAYS and BATCH_SIZE.
+    
+    Returns list of dicts with 'symbol' and 'latest_date'
+    """
     with get_db_session() as session:
-        # Total active assets
-        total_assets = session.execute(text("""
-            SELECT COUNT(*) FROM assets WHERE is_active = true
-        """)).scalar() or 0
-        
-        # Assets with price data
-        assets_with_data = session.execute(text("""
-            SELECT COUNT(DISTINCT symbol) FROM asset_prices
-        """)).scalar() or 0
-        
-        # Stale assets (not updated in STALE_DATA_DAYS)
-        stale_cutoff = date.today() - timedelta(days=STALE_DATA_DAYS)
-        stale_count = session.execute(text("""
-            SELECT COUNT(DISTINCT ap.symbol)
-            FROM asset_prices ap
-            JOIN assets a ON ap.symbol = a.symbol
-            WHERE a.is_active = true
-            GROUP BY ap.symbol
-            HAVING MAX(ap.date) < :cutoff
-        """), {'cutoff': stale_cutoff}).scalar() or 0
+        # One MAX(date) index probe per asset instead of grouping every price row
+        result = session.execute(text("""
+            SELECT symbol, latest_date FROM (
+                SELECT
+                    a.symbol,
+                    (SELECT MAX(p.date) FROM asset_prices p WHERE p.symbol = a.symbol) AS latest_date
+                FROM assets a
+                WHERE a.is_active = true AND a.symbol LIKE '%.%'
+            ) latest
+            WHERE latest_date >= :oldest AND latest_date < :through
+        """), {'oldest': through - timedelta(days=BULK_MAX_GAP_DAYS), 'through': through})
         
-        # Total price records
-        total_prices = session.execute(text("""
-            SELECT COUNT(*) FROM asset_prices
-        """)).scalar() or 0
+        return [{'symbol': row[0], 'latest_date': row[1]} for row in result]
+
+
+def get_update_statistics(exact: bool = False) -> Dict:
+    """
+    Get current data freshness statistics (cached briefly for the status page).
+    
+    total_price_records is the planner's row estimate on PostgreSQL unless
+    exact=True; counting billions of rows is a full scan.
+    """
+    cached = _statistics_cache.get(exact)
+    if cached is not None:
+        return cached
+    
+    stale_cutoff = date.today() - timedelta(days=STALE_DATA_DAYS)
+    
+    with get_db_session() as session:
+        estimate = not exact and session.bind.dialect.name == 'postgresql'
+        total_prices_sql = (
+            "(SELECT reltuples::bigint FROM pg_class WHERE relname = 'asset_prices')"
+            if estimate else "(SELECT COUNT(*) FROM asset_prices)"
+        )
         
-        # Most recent update
-        latest_date = session.execute(text("""
-            SELECT MAX(date) FROM asset_prices
-        """)).scalar()
+        # EXISTS / NOT EXISTS probes stop at the first matching (symbol, date)
+        # index entry instead of grouping every price row
+        row = session.execute(text(f"""
+            SELECT
+                (SELECT COUNT(*) FROM assets WHERE is_active = true) AS total_assets,
+                (SELECT COUNT(*) FROM assets a
+                  WHERE EXISTS (SELECT 1 FROM asset_prices p WHERE p.symbol = a.symbol)
+                ) AS assets_with_data,
+                (SELECT COUNT(*) FROM assets a
+                  WHERE a.is_active = true
+                    AND EXISTS (SELECT 1 FROM asset_prices p WHERE p.symbol = a.symbol)
+                    AND NOT EXISTS (SELECT 1 FROM asset_prices p
+                                     WHERE p.symbol = a.symbol AND p.date >= :cutoff)
+                ) AS stale_assets,
+                {total_prices_sql} AS total_prices,
+                (SELECT MAX(date) FROM asset_prices) AS latest_date
+        """), {'cutoff': stale_cutoff}).one()
         
-        return {
-            'total_assets': total_assets,
-            'assets_with_data': assets_with_data,
-            'stale_assets': stale_count,
-            'total_price_records': total_prices,
-            'latest_price_date': str(latest_date) if latest_date else None,
-            'stale_cutoff_days': STALE_DATA_DAYS
-        }
+        total_prices = row.total_prices
+        if estimate and (total_prices is None or total_prices < 0):
+            # Table never analyzed: no estimate available
+            total_prices = session.execute(text("SELECT COUNT(*) FROM asset_prices")).scalar()
+            estimate = False
+    
+    stats = {
+        'total_assets': row.total_assets or 0,
+        'assets_with_data': row.assets_with_data or 0,
+        'stale_assets': row.stale_assets or 0,
+        'total_price_records': total_prices or 0,
+        'total_price_records_estimated': estimate,
+        'latest_price_date': str(row.latest_date) if row.latest_date else None,
+        'stale_cutoff_days': STALE_DATA_DAYS
+    }
+    _statistics_cache.set(exact, stats)
+    return stats
 
 
-def update_single_ticker(symbol: str, from_date: date) -> Tuple[int, bool]:
+def fetch_ticker_update(symbol: str, from_date: date) -> Tuple[Optional[List[Dict]], str]:
     """
-    Update prices for a single ticker from a given date.
+    Fetch phase of a ticker update: prices from a given date up to today.
     
-    Returns (records_inserted, success)
+    Returns the same (data_list, status) tuple as fetch_ticker_prices.
     """
-    to_date = date.today()
-    
-    data, status = fetch_ticker_prices(
+    return fetch_ticker_prices(
         symbol,
         from_date.strftime('%Y-%m-%d'),
-        to_date.strftime('%Y-%m-%d')
+        date.today().strftime('%Y-%m-%d')
     )
+
+
+def _price_rows(symbol: str, data: List[Dict]) -> List[tuple]:
+    """UPSERT_PRICES_TEMPLATE rows for a ticker's EODHD records"""
+    # Keyed by date: ON CONFLICT can't touch the same row twice in one statement
+    rows = {}
+    for record in data:
+        try:
+            price_date = datetime.strptime(record.get('date'), '%Y-%m-%d').date()
+        except Exception as e:
+            logger.debug(f"Error processing record for {symbol}: {e}")
+            continue
+        rows[price_date] = (
+            symbol,
+            price_date,
+            record.get('open'),
+            record.get('high'),
+            record.get('low'),
+            record.get('close'),
+            record.get('adjusted_close'),
+            record.get('volume')
+        )
+    return list(rows.values())
+
+
+def _upsert_price_rows(session, rows: List[tuple]) -> int:
+    """Upsert price rows and return how many were new"""
+    if not rows:
+        return 0
+    # One set-based upsert for the whole batch instead of SELECT + UPDATE/INSERT per row.
+    # (xmax = 0) is only true for freshly inserted rows, so updates aren't counted as new.
+    raw_cur = session.connection().connection.cursor()
+    try:
+        inserted = execute_values(raw_cur, UPSERT_PRICES_SQL, rows,
+                                  template=UPSERT_PRICES_TEMPLATE, page_size=500, fetch=True)
+    finally:
+        raw_cur.close()
+    return sum(1 for (is_new,) in inserted if is_new)
+
+
+def write_ticker_prices(symbol: str, data: List[Dict]) -> int:
+    """
+    Database phase of a ticker update: upsert fetched EODHD records.
     
-    if status != 'ok' or not data:
-        return 0, False
-    
-    records_inserted = 0
-    
+    Returns the number of new records inserted.
+    """
     with get_db_session() as session:
-        for record in data:
-            try:
-                price_date = datetime.strptime(record.get('date'), '%Y-%m-%d').date()
-                
-                # Check if exists
-                existing = session.execute(text("""
-                    SELECT 1 FROM asset_prices 
-                    WHERE symbol = :symbol AND date = :date
-                """), {'symbol': symbol, 'date': price_date}).first()
-                
-                if existing:
-                    # Update existing
-                    session.execute(text("""
-                        UPDATE asset_prices SET
-                            open = :open,
-                            high = :high,
-                            low = :low,
-                            close = :close,
-                            adjusted_close = :adj_close,
-                            volume = :volume,
-                            loaded_at = NOW()
-                        WHERE symbol = :symbol AND date = :date
-                    """), {
-                        'symbol': symbol,
-                        'date': price_date,
-                        'open': record.get('open'),
-                        'high': record.get('high'),
-                        'low': record.get('low'),
-                        'close': record.get('close'),
-                        'adj_close': record.get('adjusted_close'),
-                        'volume': record.get('volume')
-                    })
-                else:
-                    # Insert new
-                    session.execute(text("""
-                        INSERT INTO asset_prices 
-                        (symbol, date, open, high, low, close, adjusted_close, volume, 
-                         data_source, is_validated, loaded_at)
-                        VALUES 
-                        (:symbol, :date, :open, :high, :low, :close, :adj_close, :volume,
-                         'EODHD', true, NOW())
-                    """), {
-                        'symbol': symbol,
-                        'date': price_date,
-                        'open': record.get('open'),
-                        'high': record.get('high'),
-                        'low': record.get('low'),
-                        'close': record.get('close'),
-                        'adj_close': record.get('adjusted_close'),
-                        'volume': record.get('volume')
-                    })
-                    records_inserted += 1
-                    
-            except Exception as e:
-                logger.debug(f"Error processing record for {symbol}: {e}")
-                continue
+        records_inserted = _upsert_price_rows(session, _price_rows(symbol, data))
         
         # Update asset's last_updated timestamp
         session.execute(text("""
             UPDATE assets SET last_updated = NOW() WHERE symbol = :symbol
         """), {'symbol': symbol})
     
-    return records_inserted, True
+    return records_inserted
+
+
+def write_bulk_prices(records_by_symbol: Dict[str, List[Dict]]) -> int:
+    """
+    write_ticker_prices for many tickers in one transaction (bulk endpoint results).
+    
+    Returns the number of new records inserted.
+    """
+    rows = []
+    for symbol, data in records_by_symbol.items():
+        rows.extend(_price_rows(symbol, data))
+    
+    with get_db_session() as session:
+        records_inserted = _upsert_price_rows(session, rows)
+        session.execute(text("""
+            UPDATE assets SET last_updated = NOW() WHERE symbol IN :symbols
+        """).bindparams(bindparam('symbols', expanding=True)),
+            {'symbols': list(records_by_symbol)})
+    
+    return records_inserted
+
+
+def update_single_ticker(symbol: str, from_date: date) -> Tuple[int, bool]:
+    """
+    Update prices for a single ticker from a given date.
+    
+    Returns (records_inserted, success)
+    """
+    data, status = fetch_ticker_update(symbol, from_date)
+    
+    if status != 'ok' or not data:
+        return 0, False
+    
+    return write_ticker_prices(symbol, data), True
+
+
+def _rate_limited_fetch(symbol: str, from_date: date) -> Tuple[Optional[List[Dict]], str]:
+    """Worker for run_batch_update's fetch pool"""
+    api_rate_limiter.wait()
+    return fetch_ticker_update(symbol, from_date)
+
+
+def _weekdays_between(after: date, through: date) -> List[date]:
+    """Weekdays in (after, through]"""
+    return [after + timedelta(days=i) for i in range(1, (through - after).days + 1)
+            if (after + timedelta(days=i)).weekday() < 5]
+
+
+def _plan_bulk_refresh(infos: List[Dict], through: date) -> Tuple[List[Dict], List[date]]:
+    """
+    Choose which of an exchange's tickers to refresh via bulk calls.
+    
+    Tickers are grouped by how far behind they are. Covering every ticker
+    last updated on or after a cutoff date takes one bulk call per weekday
+    after that cutoff, and saves one per-ticker call each. Picks the cutoff
+    with the largest saving.
+    
+    Returns (tickers, days), or two empty lists if bulk never pays off.
+    """
+    by_latest = defaultdict(list)
+    for info in infos:
+        by_latest[info['latest_date']].append(info)
+    
+    best_saving, best_cutoff = 0, None
+    covered = 0
+    for latest in sorted(by_latest, reverse=True):  # shortest gap first
+        covered += len(by_latest[latest])
+        saving = covered - BULK_CALL_COST * len(_weekdays_between(latest, through))
+        if saving > best_saving:
+            best_saving, best_cutoff = saving, latest
+    
+    if best_cutoff is None:
+        return [], []
+    return ([info for info in infos if info['latest_date'] >= best_cutoff],
+            _weekdays_between(best_cutoff, through))
+
+
+def _run_bulk_updates(stats: Dict) -> None:
+    """
+    Bring recently-behind tickers up to the last completed weekday from
+    EODHD's per-exchange bulk endpoint: one call per exchange per missing
+    day instead of one per ticker, where that costs fewer API credits.
+    
+    Tickers it skips (or misses) are caught by the per-ticker stale path.
+    """
+    today = date.today()
+    through = today - timedelta(days=1)
+    while through.weekday() >= 5:
+        through -= timedelta(days=1)
+    
+    by_exchange = defaultdict(list)
+    for info in get_bulk_candidates(through):
+        by_exchange[info['symbol'].rsplit('.', 1)[1]].append(info)
+    
+    for exchange, infos in by_exchange.items():
+        infos, days = _plan_bulk_refresh(infos, through)
+        if not days:
+            continue
+        # The daily budget guards API usage, so bulk calls are charged at their credit cost
+        if not reserve_daily_updates(BULK_CALL_COST * len(days), partial=False):
+            logger.info(f"Daily update budget too low for bulk refresh of {exchange}")
+            continue
+        
+        wanted = {info['symbol']: info['latest_date'].strftime('%Y-%m-%d') for info in infos}
+        records_by_symbol = defaultdict(list)
+        failed = False
+        for day in days:
+            api_rate_limiter.wait()
+            day_data, status = fetch_bulk_eod(exchange, day.strftime('%Y-%m-%d'))
+            if status == 'ok':
+                for symbol, record in day_data.items():
+                    if symbol in wanted and record.get('date', '') > wanted[symbol]:
+                        records_by_symbol[symbol].append(record)
+            elif status != 'no_data':  # no_data = market holiday
+                failed = True
+                break
+        
+        if failed:
+            logger.warning(f"Bulk update failed for {exchange}, leaving it to the per-ticker path")
+            continue
+        if not records_by_symbol:
+            continue
+        
+        stats['attempted'] += len(records_by_symbol)
+        try:
+            stats['records_added'] += write_bulk_prices(records_by_symbol)
+            stats['successful'] += len(records_by_symbol)
+        except Exception as e:
+            stats['failed'] += len(records_by_symbol)
+            stats['errors'].append({'symbol': f"*.{exchange}", 'error': str(e)})
+            logger.error(f"Failed to bulk update {exchange}: {e}")
+            continue
+        
+        logger.info(f"Bulk updated {exchange}: {len(days)} day(s) for {len(records_by_symbol)} tickers")
 
 
 def run_batch_update(batch_size: int = BATCH_SIZE) -> Dict:
@@ -296,39 +647,62 @@ def run_batch_update(batch_size: int = BATCH_SIZE) -> Dict:
         'errors': []
     }
     
+    # Recently-behind tickers first; those it refreshes drop out of the stale list
+    _run_bulk_updates(stats)
+    
     # Get stale tickers
     stale_tickers = get_stale_tickers(batch_size)
     
     if not stale_tickers:
         stats['message'] = 'No stale tickers found - all data is current!'
+        if stats['successful']:
+            invalidate_data_caches()
         return stats
     
+    allowed = reserve_daily_updates(len(stale_tickers))
+    if allowed == 0:
+        stats['message'] = f'Daily update limit reached ({MAX_DAILY_UPDATES} tickers/day)'
+        if stats['successful']:
+            invalidate_data_caches()
+        return stats
+    stale_tickers = stale_tickers[:allowed]
+    
     logger.info(f"Starting batch update of {len(stale_tickers)} tickers")
     
-    for ticker_info in stale_tickers:
-        symbol = ticker_info['symbol']
-        latest_date = ticker_info['latest_date']
-        from_date = latest_date + timedelta(days=1)
-        
-        stats['attempted'] += 1
+    # Fetches run concurrently (network-bound); DB writes stay on this thread
+    # and proceed as each fetch completes.
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(
+                _rate_limited_fetch,
+                ticker_info['symbol'],
+                ticker_info['latest_date'] + timedelta(days=1)
+            ): ticker_info['symbol']
+            for ticker_info in stale_tickers
+        }
         
-        try:
-            records, success = update_single_ticker(symbol, from_date)
+        for future in as_completed(futures):
+            symbol = futures[future]
+            stats['attempted'] += 1
             
-            if success:
-                stats['successful'] += 1
-                stats['records_added'] += records
-                logger.debug(f"Updated {symbol}: +{records} records")
-            else:
-                stats['failed'] += 1
+            try:
+                data, status = future.result()
                 
-        except Exception as e:
-            stats['failed'] += 1
-            stats['errors'].append({'symbol': symbol, 'error': str(e)})
-            logger.error(f"Failed to update {symbol}: {e}")
-        
-        # Rate limiting
-        time.sleep(API_RATE_LIMIT_DELAY)
+                if status == 'ok' and data:
+                    records = write_ticker_prices(symbol, data)
+                    stats['successful'] += 1
+                    stats['records_added'] += records
+                    logger.debug(f"Updated {symbol}: +{records} records")
+                else:
+                    stats['failed'] += 1
+                    
+            except Exception as e:
+                stats['failed'] += 1
+                stats['errors'].append({'symbol': symbol, 'error': str(e)})
+                logger.error(f"Failed to update {symbol}: {e}")
+    
+    if stats['successful']:
+        invalidate_data_caches()
     
     stats['duration_seconds'] = round(time.time() - start_time, 2)
     stats['completed_at'] = datetime.utcnow().isoformat()
@@ -354,6 +728,7 @@ class BackgroundUpdater:
         self.last_run = None
         self.last_stats = None
         self.interval_hours = UPDATE_INTERVAL_HOURS
+        self._stop_event = threading.Event()
     
     def start(self):
         """Start the background updater"""
@@ -362,6 +737,7 @@ class BackgroundUpdater:
             return
         
         self.is_running = True
+        self._stop_event.clear()
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
         self.thread.start()
         logger.info(f"Background updater started (interval: {self.interval_hours}h)")
@@ -369,28 +745,28 @@ class BackgroundUpdater:
     def stop(self):
         """Stop the background updater"""
         self.is_running = False
+        self._stop_event.set()  # Wake the loop now rather than after its sleep
         logger.info("Background updater stopped")
     
     def _run_loop(self):
         """Main loop for background updates"""
         while self.is_running:
+            # Sleep until the next scheduled run (or until stop() is called)
+            if self.last_run:
+                next_run = self.last_run + timedelta(hours=self.interval_hours)
+                sleep_for = max(0.0, (next_run - datetime.utcnow()).total_seconds())
+                if self._stop_event.wait(timeout=sleep_for):
+                    break
+            
             try:
-                # Check if we should run (based on time since last run)
-                if self.last_run:
-                    hours_since = (datetime.utcnow() - self.last_run).total_seconds() / 3600
-                    if hours_since < self.interval_hours:
-                        time.sleep(60)  # Check again in 1 minute
-                        continue
-                
                 logger.info("Background updater running scheduled update...")
                 self.last_stats = run_batch_update(BATCH_SIZE)
                 self.last_run = datetime.utcnow()
-                
             except Exception as e:
                 logger.error(f"Background updater error: {e}")
-            
-            # Sleep for a bit before checking again
-            time.sleep(60)
+                # Retry in a minute rather than waiting a full interval
+                if self._stop_event.wait(timeout=60):
+                    break
     
     def get_status(self) -> Dict:
         """Get current status of the background updater"""
@@ -436,12 +812,20 @@ def update_specific_tickers(symbols: List[str]) -> Dict:
         'records_added': 0
     }
     
-    for symbol in symbols:
-        # Get last date for this ticker
+    # Last stored date for every requested ticker in one query
+    last_dates = {}
+    if symbols:
         with get_db_session() as session:
-            result = session.execute(text("""
-                SELECT MAX(date) FROM asset_prices WHERE symbol = :symbol
-            """), {'symbol': symbol}).scalar()
+            rows = session.execute(text("""
+                SELECT symbol, MAX(date) FROM asset_prices
+                WHERE symbol IN :symbols
+                GROUP BY symbol
+            """).bindparams(bindparam('symbols', expanding=True)),
+                {'symbols': list(symbols)}).all()
+        last_dates = {row[0]: row[1] for row in rows}
+    
+    for symbol in symbols:
+        result = last_dates.get(symbol)
         
         if result:
             from_date = result + timedelta(days=1)
@@ -458,5 +842,8 @@ def update_specific_tickers(symbols: List[str]) -> Dict:
         
         time.sleep(API_RATE_LIMIT_DELAY)
     
+    if stats['successful']:
+        invalidate_data_caches()
+    
     stats['completed_at'] = datetime.utcnow().isoformat()
     return stats
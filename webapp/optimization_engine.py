@@ -3,20 +3,288 @@ import numpy as np
 import pandas as pd
 from scipy.optimize import minimize
 import logging
+import multiprocessing
+import os
+import threading
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 
 logger = logging.getLogger("Optimizer")
 
+
+def _max_drawdown(port_rets):
+    """Most negative peak-to-trough drawdown of a daily return series"""
+    wealth = np.cumprod(1.0 + np.asarray(port_rets, dtype=np.float64))
+    peak = np.maximum.accumulate(wealth)
+    np.divide(wealth, peak, out=peak)
+    return peak.min() - 1.0 if peak.size else 0.0
+
+
+def _ledoit_wolf_shrinkage(X):
+    """Ledoit-Wolf optimal intensity for shrinking the covariance of X (T x N) toward mu*I"""
+    n, p = X.shape
+    if n < 2 or p < 2:
+        return 0.0
+    X = X - X.mean(axis=0)
+    X2 = X ** 2
+    emp_cov_trace = X2.sum(axis=0) / n
+    mu = emp_cov_trace.sum() / p
+    delta_ = ((X.T @ X) ** 2).sum() / n ** 2
+    beta_ = (X2.T @ X2).sum()
+    beta = (beta_ / n - delta_) / (p * n)
+    delta = (delta_ - 2.0 * mu * emp_cov_trace.sum() + p * mu ** 2) / p
+    beta = min(beta, delta)
+    return 0.0 if beta <= 0 or delta <= 0 else float(beta / delta)
+
+
+# Mean-variance objectives as pure array functions: shared by the optimizer methods and the
+# robust-resample workers, and passed to SLSQP with args= so no closure is built per solve
+
+def _vol_and_grad(w, cov):
+    """Portfolio volatility and its gradient Σw / σ"""
+    # The MV problems are QPs, but SLSQP with this exact gradient converges in a few
+    # iterations; trust-constr with the constant Hessian measured 15-30x slower here
+    cov_w = cov @ w
+    vol = np.sqrt(w @ cov_w)
+    return vol, cov_w / vol
+
+
+def _neg_sharpe_and_grad(w, mu, cov, rf_rate):
+    """Negative Sharpe ratio and its gradient"""
+    cov_w = cov @ w
+    var = w @ cov_w
+    vol = np.sqrt(var)
+    excess = mu @ w - rf_rate
+    return -excess / vol, (excess * cov_w / var - mu) / vol
+
+
+def _neg_return_and_grad(w, mu):
+    return -(mu @ w), -mu
+
+
+def _tangency_weights(mu, cov, rf_rate):
+    """
+    Tangency portfolios C^-1 (mu - rf) rescaled to sum to one, for stacked inputs
+    (K, n) / (K, n, n). Returns (weights, exact): a row is the exact long-only max-Sharpe
+    solution only where it needs no clipping, since clipping negatives would not be optimal.
+    """
+    w = np.linalg.solve(cov, (mu - rf_rate)[..., None])[..., 0]
+    totals = w.sum(axis=-1)
+    exact = np.isfinite(totals) & (totals > 0) & (w >= 0).all(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = w / totals[..., None]
+    return w, exact
+
+
+def _budget_and_group_cons(n, group):
+    """Budget constraint plus the optional (A, lb, ub) group bounds, as SLSQP dicts"""
+    ones = np.ones(n)
+    cons = [{'type': 'eq', 'fun': lambda x: x.sum() - 1.0, 'jac': lambda x: ones}]
+    if group is not None:
+        A, lb, ub = group
+        cons.append({'type': 'ineq', 'fun': lambda x: A @ x - lb, 'jac': lambda x: A})
+        cons.append({'type': 'ineq', 'fun': lambda x: ub - A @ x, 'jac': lambda x: -A})
+    return cons
+
+
+def _solve_mean_variance(kind, mu, cov, rf_rate, target, bounds, base_cons, x0):
+    """One SLSQP solve of a robust-optimizer objective on the given (mu, cov)"""
+    cons = list(base_cons)
+    if kind == 'sharpe':
+        objective, obj_args = _neg_sharpe_and_grad, (mu, cov, rf_rate)
+    elif kind == 'min_vol' or kind == 'min_vol_target_return':
+        objective, obj_args = _vol_and_grad, (cov,)
+        if kind == 'min_vol_target_return':
+            cons.append({'type': 'ineq', 'fun': lambda x: mu @ x - target, 'jac': lambda x: mu})
+    else:  # max_return_target_vol
+        objective, obj_args = _neg_return_and_grad, (mu,)
+        cons.append({'type': 'ineq', 'fun': lambda x: target - _vol_and_grad(x, cov)[0],
+                     'jac': lambda x: -_vol_and_grad(x, cov)[1]})
+    return minimize(objective, x0, args=obj_args, method='SLSQP', bounds=bounds,
+                    constraints=cons, jac=True)
+
+
+def _robust_resample_batch(args):
+    """
+    Worker for the robust optimizers: solve one objective on `count` perturbed inputs.
+    Pure function of its arguments (picklable, no optimizer state). `rngs` holds one spawned
+    Generator per resample; all perturbations are drawn up front, then solved one by one,
+    each warm-started from x0.
+    """
+    kind, mu, cov, rf_rate, target, bounds, group, scale, x0, rngs = args
+    count = len(rngs)
+    shm = None
+    if isinstance(cov, tuple):  # (name, shape) of a shared-memory block from the parent
+        shm = shared_memory.SharedMemory(name=cov[0])
+        cov = np.ndarray(cov[1], dtype=np.float64, buffer=shm.buf)
+    n = len(mu)
+    lo, hi = np.asarray(bounds, dtype=np.float64).T
+    base_cons = _budget_and_group_cons(n, group)
+    
+    # One spawned stream per resample, so results don't depend on how resamples are batched
+    noise_returns_all = np.empty((count, n))
+    noise_cov_all = np.empty((count, n, n))
+    for i, rng in enumerate(rngs):
+        rng.standard_normal(n, out=noise_returns_all[i])
+        rng.standard_normal((n, n), out=noise_cov_all[i])
+    noise_returns_all *= scale
+    noise_cov_all *= scale
+    noise_cov_all = 0.5 * (noise_cov_all + noise_cov_all.transpose(0, 2, 1))
+    psd_all = cov * (1 + noise_cov_all * 0.5)
+    try:
+        # Moderate noise almost always leaves every slice positive definite; a stacked
+        # Cholesky (~15x cheaper than eigh) confirms that and the repair is skipped
+        np.linalg.cholesky(psd_all)
+    except np.linalg.LinAlgError:
+        # Project the offending covariances onto the PSD cone (one stacked LAPACK call);
+        # slices that are already definite enough are left untouched
+        eigvals_all, eigvecs_all = np.linalg.eigh(psd_all)
+        bad = eigvals_all[:, 0] < 1e-8
+        eigvals_bad = np.maximum(eigvals_all[bad], 1e-8)
+        eigvecs_bad = eigvecs_all[bad]
+        # V diag(λ) Vᵀ per slice (einsum 'kij,kj,klj->kil'); the batched matmul is ~3x faster
+        psd_all[bad] = (eigvecs_bad * eigvals_bad[:, None, :]) @ eigvecs_bad.transpose(0, 2, 1)
+    if shm is not None:
+        del cov  # release the view before detaching
+        shm.close()
+    
+    weights_buf = np.empty((count, n))
+    success_mask = np.zeros(count, dtype=bool)
+    
+    # Max Sharpe under only the budget and [0, 1] bounds: every long-only tangency portfolio
+    # C^-1 (mu - rf) is exact, so solve the whole stack at once and keep SLSQP for the rest
+    if kind == 'sharpe' and group is None and (lo <= 0).all() and (hi >= 1).all() and count:
+        w_all, exact = _tangency_weights(mu * (1 + noise_returns_all), psd_all, rf_rate)
+        weights_buf[exact] = w_all[exact]
+        success_mask[exact] = True
+    
+    for i in range(count):
+        if success_mask[i]:
+            continue
+        try:
+            # Min-vol ignores expected returns, so its return noise goes unused
+            p_mu = mu if kind == 'min_vol' else mu * (1 + noise_returns_all[i])
+            result = _solve_mean_variance(kind, p_mu, psd_all[i], rf_rate, target, bounds, base_cons, x0)
+            # Target-constrained variants only keep converged solutions
+            if result.success or kind in ('sharpe', 'min_vol'):
+                weights_buf[i] = result.x
+                success_mask[i] = True
+        except Exception as e:
+            logger.warning(f"Robust {kind} resample failed: {e}")
+    return weights_buf[success_mask]
+
+
+# Interpretation bands for bisect_left: values strictly above bins[i] get labels[i + 1]
+_HHI_BINS = (0.1, 0.25)
+_HHI_LABELS = ('Well Diversified', 'Moderate', 'High Concentration')
+_DR_BINS = (1.2, 1.5)
+_DR_LABELS = ('Low Benefit', 'Good', 'Excellent')
+
+STRESS_EVENTS = (
+    {"name": "Covid-19", "start": "2020-02-19", "end": "2020-03-23"},
+    {"name": "2022 Bear", "start": "2022-01-03", "end": "2022-10-12"},
+    {"name": "2018 Correction", "start": "2018-09-20", "end": "2018-12-24"},
+    {"name": "2008 Crisis", "start": "2007-10-09", "end": "2009-03-09"},
+)
+# Event bounds as int64 nanoseconds, comparable with DatetimeIndex.asi8
+_STRESS_STARTS_NS = pd.to_datetime([e["start"] for e in STRESS_EVENTS]).asi8
+_STRESS_ENDS_NS = pd.to_datetime([e["end"] for e in STRESS_EVENTS]).asi8
+
+
+# One process pool per server process, shared by every request and created on first use.
+# Workers come from a forkserver rather than fork(), which would copy the web server's
+# threads and locks mid-request; the server preloads this module (and NumPy/SciPy with it)
+# so new workers start warm
+POOL_MAX_WORKERS = 4
+_pool = None
+_pool_lock = threading.Lock()
+# Set inside pool workers, whose robust methods then resample serially instead of nesting pools
+_in_pool_worker = False
+
+
+def _pool_size():
+    return min(POOL_MAX_WORKERS, os.cpu_count() or 1)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=_pool_size(), mp_context=ctx)
+        return _pool
+
+
+def _pool_map(fn, *iterables):
+    """pool.map over the shared pool; a pool broken by a dead worker is replaced on the next call"""
+    global _pool
+    pool = _get_pool()
+    try:
+        return list(pool.map(fn, *iterables))
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+
+
+def _run_strategy(optimizer, method_name, args, kwargs):
+    global _in_pool_worker
+    _in_pool_worker = True
+    return getattr(optimizer, method_name)(*args, **kwargs)
+
+
 class PortfolioOptimizer:
+    # Below this many return observations per asset the covariance is Ledoit-Wolf shrunk
+    SHRINK_MIN_OBS_PER_ASSET = 10
+    # Robust resampling fans out over the worker pool from this many assets (smaller solves
+    # are cheaper than shipping them to other processes)
+    ROBUST_PARALLEL_MIN_ASSETS = 25
+
     def __init__(self, price_df, risk_free_rate=0.04, benchmark_returns=None,
-                 group_constraints=None, ticker_groups=None):
+                 group_constraints=None, ticker_groups=None, seed=None):
         self.prices = price_df
         self.returns = self.prices.pct_change().dropna()
+        if not isinstance(self.returns.index, pd.DatetimeIndex):
+            self.returns.index = pd.to_datetime(self.returns.index)
+        # Plain contiguous matrix for the per-iteration objectives (self._R @ w);
+        # the DataFrame is kept for date-indexed outputs
+        self._R = np.ascontiguousarray(self.returns.to_numpy(dtype=np.float64))
+        self._R_mean = self._R.mean(axis=0)
+        # Days at or below the 5th percentile (np.percentile's linear interpolation
+        # puts int(0.05 * (T - 1)) + 1 observations in the tail)
+        self._cvar_k = int(0.05 * (len(self._R) - 1)) + 1 if len(self._R) else 1
         self.rf_rate = risk_free_rate
         self.trading_days = 252
+        self._sqrt_td = np.sqrt(self.trading_days)
+        self._daily_rf = self.rf_rate / self.trading_days
+        self._date_strs = None
+        # Root seed for the robust methods (one child stream is spawned per resample); without
+        # a seed each robust call draws its root from the global NumPy RNG instead, so
+        # np.random.seed() still reproduces it. Kept as a SeedSequence rather than a Generator,
+        # which loses its seed when the optimizer is pickled to a pool worker
+        self._seed_seq = np.random.SeedSequence(seed) if seed is not None else None
         self.mean_returns = self.returns.mean() * self.trading_days
+        # Reported statistics use the sample covariance
         self.cov_matrix = self.returns.cov() * self.trading_days
+        # The optimizers use _C instead: short histories relative to the number of assets give
+        # an ill-conditioned sample covariance, so there only it is shrunk toward its
+        # average-variance identity (Ledoit-Wolf)
+        self._C = self.cov_matrix.to_numpy(dtype=np.float64)
+        self.cov_shrinkage = 0.0
+        if len(self._R) < self.SHRINK_MIN_OBS_PER_ASSET * self._R.shape[1]:
+            self.cov_shrinkage = _ledoit_wolf_shrinkage(self._R)
+        if self.cov_shrinkage > 0:
+            target = np.trace(self._C) / len(self._C)
+            self._C = (1 - self.cov_shrinkage) * self._C + self.cov_shrinkage * target * np.eye(len(self._C))
+        self._chol_cov = None
+        self._chol = None
         self.tickers = self.prices.columns.tolist()
         self.num_assets = len(self.tickers)
+        self._ones = np.ones(self.num_assets)
         self.benchmark_returns = benchmark_returns  # For tracking error optimization
         
         # Group constraints (Phase 3)
@@ -29,31 +297,83 @@ class PortfolioOptimizer:
             self._build_group_constraint_matrices()
 
     def performance_stats(self, weights):
-        weights = np.array(weights)
-        port_return = np.sum(self.mean_returns * weights)
-        port_volatility = np.sqrt(np.dot(weights.T, np.dot(self.cov_matrix, weights)))
+        weights = np.asarray(weights, dtype=np.float64)
+        port_return = np.asarray(self.mean_returns) @ weights
+        port_volatility = self._port_vol(weights)
         sharpe_ratio = (port_return - self.rf_rate) / port_volatility if port_volatility > 0 else 0
         return port_return, port_volatility, sharpe_ratio
 
-    def advanced_stats(self, weights):
-        weights = np.array(weights)
-        port_daily_rets = self.returns.dot(weights)
+    def _cov_cholesky(self):
+        """Lower Cholesky factor of the current cov_matrix, or None if it is not positive definite.
+
+        Refactored whenever cov_matrix is replaced.
+        """
+        if self._chol_cov is not self.cov_matrix:
+            try:
+                self._chol = np.linalg.cholesky(np.asarray(self.cov_matrix, dtype=np.float64))
+            except np.linalg.LinAlgError:
+                self._chol = None
+            self._chol_cov = self.cov_matrix
+        return self._chol
+
+    def _port_vol(self, weights):
+        """sqrt(w' C w) as ||L' w|| when the covariance has a Cholesky factor"""
+        L = self._cov_cholesky()
+        if L is not None:
+            Lw = L.T @ weights
+            return np.sqrt(Lw @ Lw)
+        return np.sqrt(weights @ np.asarray(self.cov_matrix) @ weights)
+
+    def _cvar(self, port_daily_rets):
+        """95% CVaR (mean of the worst 5% of days) via O(T) selection instead of a sort.
+
+        Partitions in place: pass a temporary (e.g. self._R @ w), not a series you still need.
+        """
+        k = self._cvar_k
+        port_daily_rets.partition(k - 1)
+        return port_daily_rets[:k].mean()
+
+    def _var_cvar(self, port_daily_rets):
+        """95% VaR (np.percentile's linear interpolation) and CVaR from one partial sort"""
+        n = port_daily_rets.shape[0]
+        pos = 0.05 * (n - 1)
+        lo = int(pos)
+        hi = min(lo + 1, n - 1)
+        tail = np.partition(port_daily_rets, [lo, hi])
+        var_95 = tail[lo] + (tail[hi] - tail[lo]) * (pos - lo)
+        return var_95, tail[:self._cvar_k].mean()
+
+    def _downside_std(self, port_daily_rets):
+        """Annualised downside deviation: RMS of the negative days, measured from zero"""
+        neg = np.minimum(port_daily_rets, 0.0)
+        n = np.count_nonzero(neg)
+        return np.sqrt((neg @ neg) / n * self.trading_days) if n > 0 else 1e-6
+
+    def _sortino(self, port_daily_rets):
+        """Annualised Sortino ratio (branchless downside, no masked copy)"""
+        expected_return = port_daily_rets.mean() * self.trading_days
+        downside_std = self._downside_std(port_daily_rets)
+        return (expected_return - self.rf_rate) / downside_std if downside_std > 0 else 0
+
+    def _portfolio_series(self, weights):
+        """Daily returns, wealth, running peak and drawdown of a weight vector in one pass"""
+        port_daily = self._R @ np.asarray(weights, dtype=np.float64)
+        wealth = np.cumprod(1.0 + port_daily)
+        peak = np.maximum.accumulate(wealth)
+        drawdown = wealth / peak - 1.0
+        return port_daily, wealth, peak, drawdown
+
+    def advanced_stats(self, weights, series=None):
+        port_daily_rets, _, _, drawdown = series if series is not None else self._portfolio_series(weights)
         
         # Sortino
-        negative_rets = port_daily_rets[port_daily_rets < 0]
-        downside_std = negative_rets.std() * np.sqrt(self.trading_days) if len(negative_rets) > 0 else 1e-6
-        expected_return = port_daily_rets.mean() * self.trading_days
-        sortino = (expected_return - self.rf_rate) / downside_std if downside_std > 0 else 0
+        sortino = self._sortino(port_daily_rets)
 
         # VaR & CVaR
-        var_95 = np.percentile(port_daily_rets, 5)
-        cvar_95 = port_daily_rets[port_daily_rets <= var_95].mean()
+        var_95, cvar_95 = self._var_cvar(port_daily_rets)
 
         # Drawdown
-        cumulative = (1 + port_daily_rets).cumprod()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative / peak) - 1
-        max_drawdown = drawdown.min()
+        max_drawdown = drawdown.min() if drawdown.size else 0.0
 
         return {
             "sortino_ratio": round(sortino, 2),
@@ -71,14 +391,16 @@ class PortfolioOptimizer:
         unique_groups = sorted(set(self.ticker_groups.values()))
         n_groups = len(unique_groups)
         
-        # Build group membership matrix
+        # Group membership matrix: categorical codes give each ticker's row (-1 = ungrouped)
+        codes = pd.Categorical(
+            [self.ticker_groups.get(t) for t in self.tickers], categories=unique_groups
+        ).codes
+        grouped = np.flatnonzero(codes >= 0)
         A = np.zeros((n_groups, self.num_assets))
-        for i, group in enumerate(unique_groups):
-            for j, ticker in enumerate(self.tickers):
-                if self.ticker_groups.get(ticker) == group:
-                    A[i, j] = 1
+        A[codes[grouped], grouped] = 1
         
         self.group_constraint_matrix = A
+        self._group_neg_matrix = -A
         self.group_lower_bounds = np.array([
             self.group_constraints.get(g, {}).get('min', 0.0) 
             for g in unique_groups
@@ -99,15 +421,20 @@ class PortfolioOptimizer:
             constraints = list(base_constraints) if base_constraints else []
         
         if self.group_constraint_matrix is not None:
-            for i in range(len(self.group_lower_bounds)):
-                constraints.append({
-                    'type': 'ineq',
-                    'fun': lambda w, idx=i: (self.group_constraint_matrix[idx] @ w) - self.group_lower_bounds[idx]
-                })
-                constraints.append({
-                    'type': 'ineq',
-                    'fun': lambda w, idx=i: self.group_upper_bounds[idx] - (self.group_constraint_matrix[idx] @ w)
-                })
+            # Two vector-valued constraints covering every group; linear in w, so the
+            # Jacobians are the constant matrices +A / -A
+            A, neg_A = self.group_constraint_matrix, self._group_neg_matrix
+            lb, ub = self.group_lower_bounds, self.group_upper_bounds
+            constraints.append({
+                'type': 'ineq',
+                'fun': lambda w: A @ w - lb,
+                'jac': lambda w: A
+            })
+            constraints.append({
+                'type': 'ineq',
+                'fun': lambda w: ub - A @ w,
+                'jac': lambda w: neg_A
+            })
         
         return constraints
 
@@ -115,69 +442,92 @@ class PortfolioOptimizer:
     # MEAN-VARIANCE OPTIMIZATION (Methods 1-6)
     # ========================================================================
 
+    def _tangency_closed_form(self, mu, cov):
+        """Long-only tangency weights from C^-1 (mu - rf), or None if that solution isn't long-only"""
+        try:
+            w, exact = _tangency_weights(mu[None], cov[None], self.rf_rate)
+        except np.linalg.LinAlgError:
+            return None
+        return w[0] if exact[0] else None
+
     def optimize_sharpe_ratio(self, constraints=None):
         """1. Maximize Sharpe Ratio"""
-        return self._run_optimization(lambda w: -self.performance_stats(w)[2], constraints)
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
+        cov = self._C
+        
+        # Only the budget and [0, 1] bounds: the unconstrained optimum is exact if it is long-only
+        if self.group_constraint_matrix is None and not (constraints and constraints.get('assets')):
+            w = self._tangency_closed_form(mu, cov)
+            if w is not None:
+                return self._format_weights(w)
+        
+        rf_rate = self.rf_rate
+        return self._run_optimization(lambda w: _neg_sharpe_and_grad(w, mu, cov, rf_rate), constraints, jac=True)
 
     def optimize_min_volatility(self, constraints=None):
         """2. Minimize Volatility"""
-        return self._run_optimization(lambda w: self.performance_stats(w)[1], constraints)
+        cov = self._C
+        return self._run_optimization(lambda w: _vol_and_grad(w, cov), constraints, jac=True)
 
     def optimize_min_vol_target_return(self, target_return, user_constraints=None):
         """3. Minimize Volatility subject to Target Return"""
         target_return = float(target_return) / 100.0 if target_return else 0.10
-        
-        def objective(w):
-            return self.performance_stats(w)[1]
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
+        cov = self._C
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': lambda x: mu @ x - target_return, 'jac': lambda x: mu}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
-        result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
+        result = minimize(_vol_and_grad, self._initial_guess(), args=(cov,), method='SLSQP', bounds=bounds,
+                          constraints=cons, jac=True)
         return self._format_result(result)
     
     def optimize_max_return_target_vol(self, target_volatility, user_constraints=None):
         """4. Maximize Return subject to Target Volatility"""
         target_volatility = float(target_volatility) / 100.0 if target_volatility else 0.15
-        
-        def objective(w):
-            return -self.performance_stats(w)[0]
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
+        cov = self._C
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: target_volatility - self.performance_stats(x)[1]}
+            self._sum_to_one_cons(),
+            {'type': 'ineq',
+             'fun': lambda x: target_volatility - _vol_and_grad(x, cov)[0],
+             'jac': lambda x: -_vol_and_grad(x, cov)[1]}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
-        result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
+        result = minimize(_neg_return_and_grad, self._initial_guess(), args=(mu,), method='SLSQP', bounds=bounds,
+                          constraints=cons, jac=True)
         return self._format_result(result)
     
     def optimize_risk_parity(self):
         """5. Risk Parity (Equal Risk Contribution)"""
+        cov = self._C
+        
         def risk_parity_objective(w):
-            port_vol = np.sqrt(np.dot(w.T, np.dot(self.cov_matrix, w)))
+            cov_w = cov @ w
+            port_vol = np.sqrt(w @ cov_w)
             if port_vol == 0:
                 return 1e10
-            marginal_contrib = np.dot(self.cov_matrix, w) / port_vol
+            marginal_contrib = cov_w / port_vol
             risk_contrib = w * marginal_contrib
             target_risk = port_vol / self.num_assets
             return np.sum((risk_contrib - target_risk) ** 2)
         
         bounds = tuple((0.0, 1.0) for _ in range(self.num_assets))
-        cons = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+        cons = self._sum_to_one_cons()
         
         result = minimize(risk_parity_objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
         return self._format_result(result)
     
     def equal_weight_portfolio(self):
         """6. Equal Weight (Baseline)"""
-        weights = np.ones(self.num_assets) / self.num_assets
-        return self._format_result(self._dummy_result(weights))
+        return self._format_weights(np.full(self.num_assets, 1.0 / self.num_assets))
 
     # ========================================================================
     # CVAR OPTIMIZATION (Methods 7-9)
@@ -186,26 +536,22 @@ class PortfolioOptimizer:
     def optimize_min_cvar(self, constraints=None):
         """7. Minimize Conditional Value-at-Risk"""
         def cvar_objective(w):
-            port_daily_rets = self.returns.dot(w)
-            var_95 = np.percentile(port_daily_rets, 5)
-            cvar = port_daily_rets[port_daily_rets <= var_95].mean()
-            return cvar  # Negative (loss), minimize it
+            return self._cvar(self._R @ w)  # Negative (loss), minimize it
         
         return self._run_optimization(cvar_objective, constraints)
 
     def optimize_min_cvar_target_return(self, target_return, user_constraints=None):
         """8. Minimize CVaR subject to Target Return"""
         target_return = float(target_return) / 100.0 if target_return else 0.10
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
         
         def cvar_objective(w):
-            port_daily_rets = self.returns.dot(w)
-            var_95 = np.percentile(port_daily_rets, 5)
-            return port_daily_rets[port_daily_rets <= var_95].mean()
+            return self._cvar(self._R @ w)
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': lambda x: mu @ x - target_return}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
@@ -215,19 +561,17 @@ class PortfolioOptimizer:
     def optimize_max_return_target_cvar(self, target_cvar, user_constraints=None):
         """9. Maximize Return subject to Target CVaR"""
         target_cvar = float(target_cvar) / 100.0 if target_cvar else -0.02
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
         
         def objective(w):
-            return -self.performance_stats(w)[0]
+            return -(mu @ w)
         
         def cvar_constraint(w):
-            port_daily_rets = self.returns.dot(w)
-            var_95 = np.percentile(port_daily_rets, 5)
-            cvar = port_daily_rets[port_daily_rets <= var_95].mean()
-            return cvar - target_cvar  # CVaR >= target (less negative)
+            return self._cvar(self._R @ w) - target_cvar  # CVaR >= target (less negative)
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
+            self._sum_to_one_cons(),
             {'type': 'ineq', 'fun': cvar_constraint}
         ]
         cons = self._add_group_constraints_to_list(cons)
@@ -239,66 +583,76 @@ class PortfolioOptimizer:
     # TRACKING ERROR OPTIMIZATION (Methods 10-12)
     # ========================================================================
 
-    def optimize_min_tracking_error(self, benchmark_ticker, user_constraints=None):
-        """10. Minimize Tracking Error vs Benchmark"""
+    def _benchmark_returns(self, benchmark_ticker):
+        """Contiguous copy of the benchmark's daily returns (a column slice of _R is strided)"""
         if benchmark_ticker not in self.tickers:
             raise ValueError(f"Benchmark {benchmark_ticker} not in portfolio")
-        
-        bench_idx = self.tickers.index(benchmark_ticker)
-        bench_returns = self.returns.iloc[:, bench_idx]
+        return self._R[:, self.tickers.index(benchmark_ticker)].copy()
+
+    def _active_stats(self, w, bench):
+        """Annualised tracking error, its gradient, and annualised excess return vs bench"""
+        R, sqrt_td = self._R, self._sqrt_td
+        diff = R @ w - bench
+        mean_diff = diff.mean()
+        diff -= mean_diff
+        n = diff.shape[0]
+        daily_te = np.sqrt(diff @ diff / (n - 1))
+        if daily_te > 0:
+            te_grad = (R.T @ diff) * (sqrt_td / ((n - 1) * daily_te))
+        else:
+            te_grad = np.zeros_like(w)
+        return daily_te * sqrt_td, te_grad, mean_diff * self.trading_days
+
+    def optimize_min_tracking_error(self, benchmark_ticker, user_constraints=None):
+        """10. Minimize Tracking Error vs Benchmark"""
+        bench = self._benchmark_returns(benchmark_ticker)
         
         def tracking_error_objective(w):
-            port_rets = self.returns.dot(w)
-            tracking_diff = port_rets - bench_returns
-            return tracking_diff.std() * np.sqrt(self.trading_days)
+            te, te_grad, _ = self._active_stats(w, bench)
+            return te, te_grad
         
-        return self._run_optimization(tracking_error_objective, user_constraints)
+        return self._run_optimization(tracking_error_objective, user_constraints, jac=True)
 
     def optimize_max_information_ratio(self, benchmark_ticker, user_constraints=None):
         """11. Maximize Information Ratio"""
-        if benchmark_ticker not in self.tickers:
-            raise ValueError(f"Benchmark {benchmark_ticker} not in portfolio")
-        
-        bench_idx = self.tickers.index(benchmark_ticker)
-        bench_returns = self.returns.iloc[:, bench_idx]
+        bench = self._benchmark_returns(benchmark_ticker)
+        ann_mean_R = self._R_mean * self.trading_days
         
         def information_ratio_objective(w):
-            port_rets = self.returns.dot(w)
-            excess_rets = port_rets - bench_returns
-            excess_return = excess_rets.mean() * self.trading_days
-            tracking_error = excess_rets.std() * np.sqrt(self.trading_days)
-            ir = excess_return / tracking_error if tracking_error > 0 else 0
-            return -ir  # Maximize by minimizing negative
-        
-        return self._run_optimization(information_ratio_objective, user_constraints)
+            tracking_error, te_grad, excess_return = self._active_stats(w, bench)
+            if tracking_error <= 0:
+                return 0.0, np.zeros_like(w)
+            ir = excess_return / tracking_error
+            ir_grad = (ann_mean_R - ir * te_grad) / tracking_error
+            return -ir, -ir_grad  # Maximize by minimizing negative
+        
+        return self._run_optimization(information_ratio_objective, user_constraints, jac=True)
 
     def optimize_max_excess_return_target_te(self, benchmark_ticker, target_te, user_constraints=None):
         """12. Maximize Excess Return subject to Target Tracking Error"""
-        if benchmark_ticker not in self.tickers:
-            raise ValueError(f"Benchmark {benchmark_ticker} not in portfolio")
-        
         target_te = float(target_te) / 100.0 if target_te else 0.05
-        bench_idx = self.tickers.index(benchmark_ticker)
-        bench_returns = self.returns.iloc[:, bench_idx]
+        bench = self._benchmark_returns(benchmark_ticker)
+        # Excess return is linear in w: mean(R @ w - bench) = mean_R @ w - mean(bench)
+        mean_R = self._R_mean * self.trading_days
+        bench_mean = bench.mean() * self.trading_days
         
         def objective(w):
-            port_rets = self.returns.dot(w)
-            excess_return = (port_rets - bench_returns).mean() * self.trading_days
-            return -excess_return
+            return -(mean_R @ w - bench_mean), -mean_R
         
         def te_constraint(w):
-            port_rets = self.returns.dot(w)
-            te = (port_rets - bench_returns).std() * np.sqrt(self.trading_days)
-            return target_te - te
+            return target_te - self._active_stats(w, bench)[0]
+        
+        def te_constraint_jac(w):
+            return -self._active_stats(w, bench)[1]
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': te_constraint}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': te_constraint, 'jac': te_constraint_jac}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
-        result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
+        result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons, jac=True)
         return self._format_result(result)
 
     # ========================================================================
@@ -308,7 +662,7 @@ class PortfolioOptimizer:
     def optimize_kelly_criterion(self, constraints=None):
         """13. Maximize Kelly Criterion (Geometric Mean)"""
         def kelly_objective(w):
-            port_rets = self.returns.dot(w)
+            port_rets = self._R @ w
             geometric_mean = np.exp(np.log(1 + port_rets).mean()) - 1
             return -geometric_mean * self.trading_days
         
@@ -317,18 +671,15 @@ class PortfolioOptimizer:
     def optimize_min_drawdown_target_return(self, target_return, user_constraints=None):
         """14. Minimize Maximum Drawdown subject to Target Return"""
         target_return = float(target_return) / 100.0 if target_return else 0.10
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
         
         def drawdown_objective(w):
-            port_rets = self.returns.dot(w)
-            cumulative = (1 + port_rets).cumprod()
-            peak = cumulative.expanding(min_periods=1).max()
-            drawdown = (cumulative / peak) - 1
-            return drawdown.min()  # Most negative value
+            return _max_drawdown(self._R @ w)  # Most negative value
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': lambda x: mu @ x - target_return}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
@@ -338,19 +689,23 @@ class PortfolioOptimizer:
     def optimize_max_omega_target_return(self, target_return, user_constraints=None):
         """15. Maximize Omega Ratio subject to Target Return"""
         target_return_pct = float(target_return) / 100.0 if target_return else 0.10
-        threshold = self.rf_rate / self.trading_days  # Daily threshold
+        threshold = self._daily_rf  # Daily threshold
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
         
         def omega_objective(w):
-            port_rets = self.returns.dot(w)
-            gains = port_rets[port_rets > threshold] - threshold
-            losses = threshold - port_rets[port_rets <= threshold]
-            omega = gains.sum() / losses.sum() if losses.sum() > 0 else 0
+            diff = self._R @ w
+            diff -= threshold
+            total = diff.sum()
+            # gains - losses == total, so one clipped pass gives both sums
+            gains = np.maximum(diff, 0.0, out=diff).sum()
+            losses = gains - total
+            omega = gains / losses if losses > 0 else 0
             return -omega
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return_pct}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': lambda x: mu @ x - target_return_pct}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
@@ -360,19 +715,15 @@ class PortfolioOptimizer:
     def optimize_max_sortino_target_return(self, target_return, user_constraints=None):
         """16. Maximize Sortino Ratio subject to Target Return"""
         target_return_pct = float(target_return) / 100.0 if target_return else 0.10
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
         
         def sortino_objective(w):
-            port_rets = self.returns.dot(w)
-            expected_return = port_rets.mean() * self.trading_days
-            negative_rets = port_rets[port_rets < 0]
-            downside_std = negative_rets.std() * np.sqrt(self.trading_days) if len(negative_rets) > 0 else 1e-6
-            sortino = (expected_return - self.rf_rate) / downside_std
-            return -sortino
+            return -self._sortino(self._R @ w)
         
         bounds = self._build_bounds(user_constraints)
         cons = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return_pct}
+            self._sum_to_one_cons(),
+            {'type': 'ineq', 'fun': lambda x: mu @ x - target_return_pct}
         ]
         cons = self._add_group_constraints_to_list(cons)
         
@@ -385,23 +736,21 @@ class PortfolioOptimizer:
 
     def calculate_portfolio_stats(self, weights):
         """Calculate stats for any given weight vector"""
-        weights = np.array(weights)
+        return self._portfolio_payload(np.asarray(weights, dtype=np.float64))
+
+    def _portfolio_payload(self, weights, series=None):
+        """Weights, headline stats, curves and advanced stats shared by every result"""
+        if series is None:
+            series = self._portfolio_series(weights)
+        _, wealth, _, drawdown = series
         ret, vol, sharpe = self.performance_stats(weights)
-        adv_stats = self.advanced_stats(weights)
-        
-        clean_weights = {
-            self.tickers[i]: round(weights[i] * 100, 2) 
-            for i in range(len(weights)) 
-            if weights[i] > 0.001
-        }
-        
-        port_daily_rets = self.returns.dot(weights)
-        cumulative = (1 + port_daily_rets).cumprod()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative / peak) - 1
+        adv_stats = self.advanced_stats(weights, series)
+
+        clean_weights = self._clean_weights(weights)
+        dates = self._curve_dates()
 
-        equity_curve = [{"date": str(d.date()) if hasattr(d, "date") else str(d), "value": val} for d, val in cumulative.items()]
-        drawdown_curve = [{"date": str(d.date()) if hasattr(d, "date") else str(d), "value": val} for d, val in drawdown.items()]
+        equity_curve = [{"date": d, "value": v} for d, v in zip(dates, wealth.tolist())]
+        drawdown_curve = [{"date": d, "value": v} for d, v in zip(dates, drawdown.tolist())]
         
         output = {
             "weights": clean_weights,
@@ -414,15 +763,37 @@ class PortfolioOptimizer:
         output.update(adv_stats)
         return output
 
-    def _run_optimization(self, objective_func, user_constraints=None):
+    def _clean_weights(self, weights):
+        """Ticker -> weight % for holdings above 0.1%"""
+        mask = weights > 0.001
+        values = np.round(weights[mask] * 100, 2).tolist()
+        return dict(zip([self.tickers[i] for i in np.flatnonzero(mask)], values))
+
+    def _curve_dates(self):
+        """ISO date strings for the return index, formatted once per optimizer"""
+        if self._date_strs is None:
+            self._date_strs = self.returns.index.strftime('%Y-%m-%d').tolist()
+        return self._date_strs
+
+    def _run_optimization(self, objective_func, user_constraints=None, jac=None, x0=None):
         bounds = self._build_bounds(user_constraints)
-        cons = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+        cons = self._sum_to_one_cons()
         cons = self._add_group_constraints_to_list(cons)
-        result = minimize(objective_func, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
+        if x0 is None:
+            x0 = self._initial_guess()
+        result = minimize(objective_func, x0, method='SLSQP', bounds=bounds, constraints=cons, jac=jac)
         return self._format_result(result)
 
+    def _sum_jac(self, w):
+        """Constant Jacobian of the budget constraint sum(w) - 1"""
+        return self._ones
+
+    def _sum_to_one_cons(self):
+        """Budget constraint sum(w) == 1 with its analytic Jacobian"""
+        return {'type': 'eq', 'fun': lambda x: x.sum() - 1.0, 'jac': self._sum_jac}
+
     def _initial_guess(self):
-        return self.num_assets * [1. / self.num_assets,]
+        return np.full(self.num_assets, 1.0 / self.num_assets)
 
     def _build_bounds(self, user_constraints):
         bounds = [(0.0, 1.0) for _ in range(self.num_assets)]
@@ -435,103 +806,76 @@ class PortfolioOptimizer:
                     bounds[i] = (min_w, max_w)
         return tuple(bounds)
 
-    def _dummy_result(self, weights):
-        class DummyResult:
-            def __init__(self, x):
-                self.x = x
-        return DummyResult(weights)
-
     def _format_result(self, result):
-        weights = result.x
-        ret, vol, sharpe = self.performance_stats(weights)
-        adv_stats = self.advanced_stats(weights)
-        
-        clean_weights = {
-            self.tickers[i]: round(weights[i] * 100, 2) 
-            for i in range(len(weights)) 
-            if weights[i] > 0.001
-        }
-
-        port_daily_rets = self.returns.dot(weights)
-        cumulative = (1 + port_daily_rets).cumprod()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative / peak) - 1
+        return self._format_weights(result.x)
 
-        equity_curve = [{"date": str(d.date()) if hasattr(d, "date") else str(d), "value": val} for d, val in cumulative.items()]
-        drawdown_curve = [{"date": str(d.date()) if hasattr(d, "date") else str(d), "value": val} for d, val in drawdown.items()]
-        
-        output = {
-            "weights": clean_weights,
-            "return": round(ret * 100, 2),
-            "volatility": round(vol * 100, 2),
-            "sharpe_ratio": round(sharpe, 2),
-            "equity_curve": equity_curve,
-            "drawdown_curve": drawdown_curve
-        }
-        
-        output.update(adv_stats)
-        output["stress_tests"] = self.analyze_stress_periods(weights)
-        output["monthly_heatmap"] = self.get_monthly_heatmap(weights)
-        output["rolling_returns"] = self.get_rolling_returns(weights)
+    def _format_weights(self, weights):
+        """Full result payload (stats, curves, stress tests, heatmap, rolling) for a weight vector"""
+        weights = np.asarray(weights, dtype=np.float64)
+        series = self._portfolio_series(weights)
+        output = self._portfolio_payload(weights, series)
+        monthly = self._monthly_returns(weights, series[0])
+        output["stress_tests"] = self.analyze_stress_periods(weights, series[0])
+        output["monthly_heatmap"] = self.get_monthly_heatmap(weights, monthly)
+        output["rolling_returns"] = self.get_rolling_returns(weights, monthly)
         
         return output
 
-    def analyze_stress_periods(self, weights):
-        stress_events = [
-            {"name": "Covid-19", "start": "2020-02-19", "end": "2020-03-23"},
-            {"name": "2022 Bear", "start": "2022-01-03", "end": "2022-10-12"},
-            {"name": "2018 Correction", "start": "2018-09-20", "end": "2018-12-24"},
-            {"name": "2008 Crisis", "start": "2007-10-09", "end": "2009-03-09"}
-        ]
-        port_daily = self.returns.dot(weights)
-        if not isinstance(port_daily.index, pd.DatetimeIndex): 
-            port_daily.index = pd.to_datetime(port_daily.index)
+    def analyze_stress_periods(self, weights, port_daily=None):
+        if port_daily is None:
+            port_daily = self._R @ weights
+        idx_i8 = self.returns.index.asi8
+        los = idx_i8.searchsorted(_STRESS_STARTS_NS, side='left')
+        his = idx_i8.searchsorted(_STRESS_ENDS_NS, side='right')
         
         results = []
-        for event in stress_events:
-            start, end = pd.to_datetime(event["start"]), pd.to_datetime(event["end"])
-            mask = (port_daily.index >= start) & (port_daily.index <= end)
-            period = port_daily.loc[mask]
-            if not period.empty:
+        for event, lo, hi in zip(STRESS_EVENTS, los, his):
+            period = port_daily[lo:hi]
+            if period.size:
                 ret = (1 + period).prod() - 1
                 results.append({"name": event["name"], "start": event["start"], "end": event["end"], "return": round(ret * 100, 2)})
         return results
 
-    def get_monthly_heatmap(self, weights):
-        port_daily = self.returns.dot(weights)
-        if not isinstance(port_daily.index, pd.DatetimeIndex): 
-            port_daily.index = pd.to_datetime(port_daily.index)
-        
-        monthly = port_daily.resample('M').apply(lambda x: (1 + x).prod() - 1)
-        df = pd.DataFrame({'ret': monthly})
-        df['year'] = df.index.year
-        df['month'] = df.index.month
-        pivot = df.pivot(index='year', columns='month', values='ret').sort_index(ascending=False)
-        
-        years = pivot.index.tolist()
+    def _monthly_returns(self, weights, port_daily=None):
+        """Compounded calendar-month portfolio returns (month-end index)"""
+        if port_daily is None:
+            port_daily = self._R @ weights
+        return (1.0 + pd.Series(port_daily, index=self.returns.index)).resample('M').prod() - 1.0
+
+    def get_monthly_heatmap(self, weights, monthly=None):
+        if monthly is None:
+            monthly = self._monthly_returns(weights)
+        # Scatter month-end values straight into a (year desc) x 12 grid
+        year_codes = monthly.index.year.to_numpy()
+        month_codes = monthly.index.month.to_numpy() - 1
+        years, year_rows = np.unique(year_codes, return_inverse=True)
+        grid = np.full((len(years), 12), np.nan)
+        grid[len(years) - 1 - year_rows, month_codes] = monthly.to_numpy() * 100
+        
+        years = years[::-1].tolist()
         months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        z = []
-        for y in years:
-            row = []
-            for m in range(1, 13):
-                val = pivot.loc[y, m] if m in pivot.columns else None
-                row.append(round(val * 100, 2) if pd.notna(val) else None)
-            z.append(row)
+        z = [[None if np.isnan(v) else v for v in row] for row in np.round(grid, 2).tolist()]
             
         return {"years": years, "months": months, "z": z}
 
-    def get_rolling_returns(self, weights):
-        port_daily = self.returns.dot(weights)
-        if not isinstance(port_daily.index, pd.DatetimeIndex): 
-            port_daily.index = pd.to_datetime(port_daily.index)
-        monthly = port_daily.resample('M').apply(lambda x: (1 + x).prod() - 1)
+    def get_rolling_returns(self, weights, monthly=None):
+        if monthly is None:
+            monthly = self._monthly_returns(weights)
+        
+        # Window log-growth as a difference of running log sums (no per-window callback,
+        # no drift from long running products); annualise in log space
+        log_growth = np.concatenate(([0.0], np.cumsum(np.log1p(monthly.to_numpy()))))
+        month_dates = monthly.index.strftime('%Y-%m-%d').tolist()
         
         rolling_data = {}
         for name, window in {"1 Year": 12, "3 Years": 36}.items():
             if len(monthly) >= window:
-                cum = (1 + monthly).rolling(window=window).apply(np.prod, raw=True) - 1
-                ann = (1 + cum) ** (12 / window) - 1
-                rolling_data[name] = [{"date": str(d.date()), "value": round(v * 100, 2)} for d, v in ann.dropna().items()]
+                window_log = log_growth[window:] - log_growth[:-window]
+                ann = np.expm1(window_log * (12 / window))
+                rolling_data[name] = [
+                    {"date": d, "value": round(v * 100, 2)}
+                    for d, v in zip(month_dates[window - 1:], ann.tolist())
+                ]
         return rolling_data
 
     # ========================================================================
@@ -539,15 +883,15 @@ class PortfolioOptimizer:
     # ========================================================================
 
     def calculate_hhi(self, weights):
-        weights = np.array(weights)
+        weights = np.asarray(weights, dtype=np.float64)
         weights = weights[weights > 0.0001]
-        return float(np.sum(weights ** 2))
+        return float(weights @ weights)
 
     def calculate_diversification_ratio(self, weights):
-        weights = np.array(weights)
+        weights = np.asarray(weights, dtype=np.float64)
         asset_vols = np.sqrt(np.diag(self.cov_matrix))
-        weighted_avg_vol = np.sum(weights * asset_vols)
-        port_vol = np.sqrt(np.dot(weights.T, np.dot(self.cov_matrix, weights)))
+        weighted_avg_vol = weights @ asset_vols
+        port_vol = self._port_vol(weights)
         if port_vol < 0.0001:
             return 1.0
         return float(weighted_avg_vol / port_vol)
@@ -559,24 +903,18 @@ class PortfolioOptimizer:
         return float(1.0 / hhi)
 
     def calculate_max_drawdown_duration(self, weights):
-        port_daily_rets = self.returns.dot(weights)
-        cumulative = (1 + port_daily_rets).cumprod()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative / peak) - 1
-        in_drawdown = drawdown < 0
+        _, wealth, peak, _ = self._portfolio_series(weights)
+        in_drawdown = wealth < peak
         if not in_drawdown.any():
             return 0
-        max_duration = 0
-        current_duration = 0
-        for is_dd in in_drawdown:
-            if is_dd:
-                current_duration += 1
-                max_duration = max(max_duration, current_duration)
-            else:
-                current_duration = 0
-        return int(max_duration)
-
-    def calculate_health_score(self, weights, score_weights=None):
+        # Longest run of underwater days: pair up run starts (+1) and ends (-1)
+        edges = np.diff(np.concatenate(([0], in_drawdown.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return int((ends - starts).max())
+
+    def calculate_health_score(self, weights, score_weights=None, _metrics=None):
+        # _metrics: (hhi, div_ratio, enb) when the caller already computed them
         if score_weights is None:
             score_weights = {
                 'sharpe': 40,
@@ -587,8 +925,10 @@ class PortfolioOptimizer:
         total_weight = sum(score_weights.values())
         score_weights = {k: v / total_weight * 100 for k, v in score_weights.items()}
         ret, vol, sharpe = self.performance_stats(weights)
-        div_ratio = self.calculate_diversification_ratio(weights)
-        hhi = self.calculate_hhi(weights)
+        if _metrics is None:
+            _metrics = (self.calculate_hhi(weights), self.calculate_diversification_ratio(weights),
+                        self.calculate_enb(weights))
+        hhi, div_ratio, enb = _metrics
         max_dd_duration = self.calculate_max_drawdown_duration(weights)
         sharpe_score = min(100, max(0, sharpe * 50))
         div_score = min(100, max(0, (div_ratio - 1.0) * 100))
@@ -612,23 +952,23 @@ class PortfolioOptimizer:
                 'sharpe': round(sharpe, 2),
                 'diversification_ratio': round(div_ratio, 2),
                 'hhi': round(hhi, 4),
-                'enb': round(self.calculate_enb(weights), 1),
+                'enb': round(enb, 1),
                 'max_drawdown_duration_days': max_dd_duration
             },
             'score_weights': score_weights
         }
 
     def calculate_diversification_metrics(self, weights):
-        weights = np.array(weights)
+        weights = np.asarray(weights, dtype=np.float64)
         hhi = self.calculate_hhi(weights)
         div_ratio = self.calculate_diversification_ratio(weights)
         enb = self.calculate_enb(weights)
-        health = self.calculate_health_score(weights)
+        health = self.calculate_health_score(weights, _metrics=(hhi, div_ratio, enb))
         return {
             'hhi': round(hhi, 4),
-            'hhi_interpretation': 'High Concentration' if hhi > 0.25 else ('Moderate' if hhi > 0.1 else 'Well Diversified'),
+            'hhi_interpretation': _HHI_LABELS[bisect_left(_HHI_BINS, hhi)],
             'diversification_ratio': round(div_ratio, 2),
-            'dr_interpretation': 'Excellent' if div_ratio > 1.5 else ('Good' if div_ratio > 1.2 else 'Low Benefit'),
+            'dr_interpretation': _DR_LABELS[bisect_left(_DR_BINS, div_ratio)],
             'effective_num_bets': round(enb, 1),
             'enb_interpretation': f'~{round(enb)} independent risk exposures',
             'health_score': health['health_score'],
@@ -654,149 +994,115 @@ class PortfolioOptimizer:
             n_resamples: Number of Monte Carlo iterations (default 100 for Pro)
             perturbation_scale: How much to perturb (0.1 = 10% noise)
         """
-        all_weights = []
-        
-        for i in range(n_resamples):
-            noise_returns = np.random.normal(0, perturbation_scale, len(self.mean_returns))
-            perturbed_returns = self.mean_returns * (1 + noise_returns)
-            noise_cov = np.random.normal(0, perturbation_scale, self.cov_matrix.shape)
-            noise_cov = (noise_cov + noise_cov.T) / 2
-            perturbed_cov = self.cov_matrix * (1 + noise_cov * 0.5)
-            eigenvalues, eigenvectors = np.linalg.eigh(perturbed_cov)
-            eigenvalues = np.maximum(eigenvalues, 1e-8)
-            perturbed_cov = eigenvectors @ np.diag(eigenvalues) @ eigenvectors.T
-            orig_mean = self.mean_returns.copy()
-            orig_cov = self.cov_matrix.copy()
-            try:
-                self.mean_returns = perturbed_returns
-                self.cov_matrix = perturbed_cov
-                result = self._run_optimization(lambda w: -self.performance_stats(w)[2], constraints)
-                weights = np.array([result['weights'].get(t, 0) / 100.0 for t in self.tickers])
-                all_weights.append(weights)
-            except Exception as e:
-                logger.warning(f"Resample {i} failed: {e}")
-            finally:
-                self.mean_returns = orig_mean
-                self.cov_matrix = orig_cov
-        
-        if not all_weights:
+        avg_weights = self._robust_mean_weights('sharpe', constraints, n_resamples, perturbation_scale)
+        if avg_weights is None:
             return self.optimize_sharpe_ratio(constraints)
-        
-        avg_weights = np.mean(all_weights, axis=0)
-        avg_weights = avg_weights / np.sum(avg_weights)
-        return self._format_result(self._dummy_result(avg_weights))
+        return self._format_weights(avg_weights)
 
     def optimize_robust_min_volatility(self, constraints=None, n_resamples=100, perturbation_scale=0.1):
         """Robust Minimum Volatility using Monte Carlo resampling."""
-        all_weights = []
-        
-        for i in range(n_resamples):
-            noise_cov = np.random.normal(0, perturbation_scale, self.cov_matrix.shape)
-            noise_cov = (noise_cov + noise_cov.T) / 2
-            perturbed_cov = self.cov_matrix * (1 + noise_cov * 0.5)
-            eigenvalues, eigenvectors = np.linalg.eigh(perturbed_cov)
-            eigenvalues = np.maximum(eigenvalues, 1e-8)
-            perturbed_cov = eigenvectors @ np.diag(eigenvalues) @ eigenvectors.T
-            orig_cov = self.cov_matrix.copy()
-            try:
-                self.cov_matrix = perturbed_cov
-                result = self._run_optimization(lambda w: self.performance_stats(w)[1], constraints)
-                weights = np.array([result['weights'].get(t, 0) / 100.0 for t in self.tickers])
-                all_weights.append(weights)
-            except Exception as e:
-                logger.warning(f"Resample {i} failed: {e}")
-            finally:
-                self.cov_matrix = orig_cov
-        
-        if not all_weights:
+        avg_weights = self._robust_mean_weights('min_vol', constraints, n_resamples, perturbation_scale)
+        if avg_weights is None:
             return self.optimize_min_volatility(constraints)
-        
-        avg_weights = np.mean(all_weights, axis=0)
-        avg_weights = avg_weights / np.sum(avg_weights)
-        return self._format_result(self._dummy_result(avg_weights))
+        return self._format_weights(avg_weights)
 
     def optimize_robust_min_vol_target_return(self, target_return, constraints=None, n_resamples=100, perturbation_scale=0.1):
         """Robust Minimum Volatility subject to Target Return using Monte Carlo resampling."""
         target_return_decimal = float(target_return) / 100.0 if target_return else 0.10
-        all_weights = []
-        
-        for i in range(n_resamples):
-            noise_returns = np.random.normal(0, perturbation_scale, len(self.mean_returns))
-            perturbed_returns = self.mean_returns * (1 + noise_returns)
-            noise_cov = np.random.normal(0, perturbation_scale, self.cov_matrix.shape)
-            noise_cov = (noise_cov + noise_cov.T) / 2
-            perturbed_cov = self.cov_matrix * (1 + noise_cov * 0.5)
-            eigenvalues, eigenvectors = np.linalg.eigh(perturbed_cov)
-            eigenvalues = np.maximum(eigenvalues, 1e-8)
-            perturbed_cov = eigenvectors @ np.diag(eigenvalues) @ eigenvectors.T
-            orig_mean = self.mean_returns.copy()
-            orig_cov = self.cov_matrix.copy()
-            try:
-                self.mean_returns = perturbed_returns
-                self.cov_matrix = perturbed_cov
-                def objective(w):
-                    return self.performance_stats(w)[1]
-                bounds = self._build_bounds(constraints)
-                cons = [
-                    {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-                    {'type': 'ineq', 'fun': lambda x: self.performance_stats(x)[0] - target_return_decimal}
-                ]
-                cons = self._add_group_constraints_to_list(cons)
-                result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
-                if result.success:
-                    all_weights.append(result.x)
-            except Exception as e:
-                logger.warning(f"Robust min vol target return resample {i} failed: {e}")
-            finally:
-                self.mean_returns = orig_mean
-                self.cov_matrix = orig_cov
-        
-        if not all_weights:
+        avg_weights = self._robust_mean_weights('min_vol_target_return', constraints, n_resamples,
+                                               perturbation_scale, target=target_return_decimal)
+        if avg_weights is None:
             return self.optimize_min_vol_target_return(target_return, constraints)
-        
-        avg_weights = np.mean(all_weights, axis=0)
-        avg_weights = avg_weights / np.sum(avg_weights)
-        return self._format_result(self._dummy_result(avg_weights))
+        return self._format_weights(avg_weights)
 
     def optimize_robust_max_return_target_vol(self, target_volatility, constraints=None, n_resamples=100, perturbation_scale=0.1):
         """Robust Maximum Return subject to Target Volatility using Monte Carlo resampling."""
         target_vol_decimal = float(target_volatility) / 100.0 if target_volatility else 0.15
-        all_weights = []
-        
-        for i in range(n_resamples):
-            noise_returns = np.random.normal(0, perturbation_scale, len(self.mean_returns))
-            perturbed_returns = self.mean_returns * (1 + noise_returns)
-            noise_cov = np.random.normal(0, perturbation_scale, self.cov_matrix.shape)
-            noise_cov = (noise_cov + noise_cov.T) / 2
-            perturbed_cov = self.cov_matrix * (1 + noise_cov * 0.5)
-            eigenvalues, eigenvectors = np.linalg.eigh(perturbed_cov)
-            eigenvalues = np.maximum(eigenvalues, 1e-8)
-            perturbed_cov = eigenvectors @ np.diag(eigenvalues) @ eigenvectors.T
-            orig_mean = self.mean_returns.copy()
-            orig_cov = self.cov_matrix.copy()
+        avg_weights = self._robust_mean_weights('max_return_target_vol', constraints, n_resamples,
+                                               perturbation_scale, target=target_vol_decimal)
+        if avg_weights is None:
+            return self.optimize_max_return_target_vol(target_volatility, constraints)
+        return self._format_weights(avg_weights)
+
+    def _robust_mean_weights(self, kind, constraints, n_resamples, perturbation_scale, target=None):
+        """
+        Solve `kind` on n_resamples perturbed (mean, cov) pairs and return the averaged,
+        renormalised weights, or None if no resample produced a usable solution.
+        Resamples are independent, so large problems fan out over worker processes. Each
+        resample draws from its own spawned Generator and is warm-started from the nominal
+        (unperturbed) solution, so the result does not depend on the number of workers.
+        """
+        n_resamples = int(n_resamples)
+        group = None
+        if self.group_constraint_matrix is not None:
+            group = (self.group_constraint_matrix, self.group_lower_bounds, self.group_upper_bounds)
+        mu = np.asarray(self.mean_returns, dtype=np.float64)
+        cov = self._C
+        bounds = self._build_bounds(constraints)
+        
+        # Perturbed optima sit near the nominal one, so it is a better start than equal weights
+        x0 = self._initial_guess()
+        nominal = _solve_mean_variance(kind, mu, cov, self.rf_rate, target, bounds,
+                                       _budget_and_group_cons(self.num_assets, group), x0)
+        if np.isfinite(nominal.x).all():
+            x0 = nominal.x
+        rest = (self.rf_rate, target, bounds, group, perturbation_scale, x0)
+        
+        workers = min(n_resamples, _pool_size())
+        if self.num_assets < self.ROBUST_PARALLEL_MIN_ASSETS or _in_pool_worker:
+            workers = 1
+        seed_seq = self._seed_seq
+        if seed_seq is None:
+            seed_seq = np.random.SeedSequence(np.random.randint(0, 2**32, size=4, dtype=np.uint64))
+        rngs = [np.random.default_rng(s) for s in seed_seq.spawn(n_resamples)]
+        if workers <= 1:
+            valid = _robust_resample_batch((kind, mu, cov) + rest + (rngs,))
+        else:
+            # Workers attach to one shared copy of the O(n^2) covariance instead of unpickling it
+            shm = shared_memory.SharedMemory(create=True, size=cov.nbytes)
             try:
-                self.mean_returns = perturbed_returns
-                self.cov_matrix = perturbed_cov
-                def objective(w):
-                    return -self.performance_stats(w)[0]
-                bounds = self._build_bounds(constraints)
-                cons = [
-                    {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-                    {'type': 'ineq', 'fun': lambda x: target_vol_decimal - self.performance_stats(x)[1]}
-                ]
-                cons = self._add_group_constraints_to_list(cons)
-                result = minimize(objective, self._initial_guess(), method='SLSQP', bounds=bounds, constraints=cons)
-                if result.success:
-                    all_weights.append(result.x)
-            except Exception as e:
-                logger.warning(f"Robust max return target vol resample {i} failed: {e}")
+                np.ndarray(cov.shape, dtype=cov.dtype, buffer=shm.buf)[:] = cov
+                common = (kind, mu, (shm.name, cov.shape)) + rest
+                step = -(-n_resamples // workers)
+                batches = [rngs[i:i + step] for i in range(0, n_resamples, step)]
+                valid = np.concatenate(_pool_map(_robust_resample_batch,
+                                                 [common + (batch,) for batch in batches]))
             finally:
-                self.mean_returns = orig_mean
-                self.cov_matrix = orig_cov
-        
-        if not all_weights:
-            return self.optimize_max_return_target_vol(target_volatility, constraints)
+                shm.close()
+                shm.unlink()
+        
+        if not len(valid):
+            return None
+        avg_weights = valid.mean(axis=0)
+        avg_weights /= avg_weights.sum()
+        return avg_weights
+
+    # ========================================================================
+    # BATCH EXECUTION
+    # ========================================================================
+
+    def run_all_strategies(self, strategies):
+        """
+        Run several optimizer methods, e.g. [('optimize_sharpe_ratio', {'constraints': c}), ...],
+        and return their results in the same order.
+        Each call runs in the shared worker pool on its own pickled copy of the optimizer and
+        shares no state with the others (robust variants resample serially inside it).
+        """
+        return self._dispatch_strategies([(name, (), kwargs) for name, kwargs in strategies])
+
+    def optimize_batch(self, specs):
+        """
+        Named variant of run_all_strategies taking positional args:
+        {'label': ('optimize_min_cvar_target_return', (8, constraints)), ...} -> {'label': result}
+        """
+        labels = list(specs)
+        calls = [(specs[k][0], tuple(specs[k][1]), {}) for k in labels]
+        return dict(zip(labels, self._dispatch_strategies(calls)))
+
+    def _dispatch_strategies(self, calls):
+        """Run (method_name, args, kwargs) calls inline if there is one, else in the worker pool"""
+        if len(calls) <= 1 or _pool_size() <= 1 or _in_pool_worker:
+            return [getattr(self, name)(*args, **kwargs) for name, args, kwargs in calls]
         
-        avg_weights = np.mean(all_weights, axis=0)
-        avg_weights = avg_weights / np.sum(avg_weights)
-        return self._format_result(self._dummy_result(avg_weights))
+        names, args, kwargs = zip(*calls)
+        return _pool_map(_run_strategy, [self] * len(calls), names, args, kwargs)
@@ -7,6 +7,8 @@ import logging
 import stripe
 from datetime import datetime, timedelta
 
+from webapp.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 # Force redeploy - env vars updated 2026-01-31
 
@@ -32,21 +34,37 @@ else:
 # Set these in Railway environment variables after creating products in Stripe
 # NOTE: We use functions to read at runtime, not import time, to handle delayed env var loading
 
+# Price lookups sit on every checkout and webhook event; cache them briefly once configured
+_price_cache = TTLCache(maxsize=2, ttl=60)
+
+
 def get_price_ids():
-    """Get price IDs at runtime (not cached at import time)"""
-    return {
-        'premium': os.environ.get('STRIPE_PREMIUM_PRICE_ID'),
-        'pro': os.environ.get('STRIPE_PRO_PRICE_ID')
-    }
+    """Get price IDs at runtime (cached for a minute once all are set)"""
+    price_ids = _price_cache.get('price_ids')
+    if price_ids is None:
+        price_ids = {
+            'premium': os.environ.get('STRIPE_PREMIUM_PRICE_ID'),
+            'pro': os.environ.get('STRIPE_PRO_PRICE_ID')
+        }
+        # Missing IDs are not cached, so late-loaded env vars are picked up on the next call
+        if all(price_ids.values()):
+            _price_cache.set('price_ids', price_ids)
+    return dict(price_ids)
 
 def get_price_to_tier_map():
     """Build reverse mapping of price IDs to tier names at runtime"""
-    mapping = {}
-    for tier, price_id in get_price_ids().items():
-        if price_id:
-            mapping[price_id] = tier
+    mapping = _price_cache.get('price_to_tier')
+    if mapping is None:
+        price_ids = get_price_ids()
+        mapping = {price_id: tier for tier, price_id in price_ids.items() if price_id}
+        if len(mapping) == len(price_ids):
+            _price_cache.set('price_to_tier', mapping)
     return mapping
 
+def invalidate_price_cache():
+    """Forget cached price IDs (e.g. after the Stripe env vars were changed)"""
+    _price_cache.clear()
+
 # Log configuration status at startup (may show as not set if env vars load later)
 _startup_price_ids = get_price_ids()
 for tier, price_id in _startup_price_ids.items():
@@ -78,21 +96,17 @@ def is_stripe_configured():
     Returns:
         dict: Configuration status for each required setting
     """
+    env = os.environ
     price_ids = get_price_ids()
-    return {
-        'secret_key': bool(os.environ.get('STRIPE_SECRET_KEY')),
-        'publishable_key': bool(os.environ.get('STRIPE_PUBLISHABLE_KEY')),
-        'webhook_secret': bool(os.environ.get('STRIPE_WEBHOOK_SECRET')),
+    status = {
+        'secret_key': bool(env.get('STRIPE_SECRET_KEY')),
+        'publishable_key': bool(env.get('STRIPE_PUBLISHABLE_KEY')),
+        'webhook_secret': bool(env.get('STRIPE_WEBHOOK_SECRET')),
         'premium_price_id': bool(price_ids.get('premium')),
         'pro_price_id': bool(price_ids.get('pro')),
-        'fully_configured': all([
-            os.environ.get('STRIPE_SECRET_KEY'),
-            os.environ.get('STRIPE_PUBLISHABLE_KEY'),
-            os.environ.get('STRIPE_WEBHOOK_SECRET'),
-            price_ids.get('premium'),
-            price_ids.get('pro')
-        ])
     }
+    status['fully_configured'] = all(status.values())
+    return status
 
 
 def create_checkout_session(user_id, user_email, tier, success_url, cancel_url):
@@ -349,6 +363,17 @@ def reactivate_subscription(stripe_subscription_id):
 # WEBHOOK HANDLING
 # =============================================================================
 
+_webhook_secret = None
+
+
+def _get_webhook_secret():
+    """Webhook signing secret, read from the environment until it is first found"""
+    global _webhook_secret
+    if _webhook_secret is None:
+        _webhook_secret = os.environ.get('STRIPE_WEBHOOK_SECRET') or None
+    return _webhook_secret
+
+
 def handle_webhook_event(payload, sig_header):
     """
     Verify and parse a Stripe webhook event.
@@ -367,7 +392,7 @@ def handle_webhook_event(payload, sig_header):
         ValueError: If payload is invalid
         stripe.error.SignatureVerificationError: If signature is invalid
     """
-    webhook_secret = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    webhook_secret = _get_webhook_secret()
     
     if not webhook_secret:
         logger.error("STRIPE_WEBHOOK_SECRET not configured - cannot verify webhooks")
@@ -399,25 +424,29 @@ def get_tier_from_subscription(subscription):
         str: Tier name ('premium', 'pro') or 'free' if not recognized
     """
     try:
-        # Handle both Stripe objects and dicts (from webhooks)
-        if hasattr(subscription, 'get'):
-            items = subscription.get('items', {}).get('data', [])
+        # Webhook payloads are plain dicts; API responses are Stripe objects (not dicts)
+        if isinstance(subscription, dict):
+            items = (subscription.get('items') or {}).get('data') or []
+            metadata = subscription.get('metadata')
         else:
-            items = subscription.items.data if hasattr(subscription, 'items') else []
+            item_list = getattr(subscription, 'items', None)
+            items = item_list.data if item_list is not None else []
+            metadata = getattr(subscription, 'metadata', None)
         
         if items:
             # Get the first item's price ID
-            if hasattr(items[0], 'get'):
-                price_id = items[0].get('price', {}).get('id')
+            item = items[0]
+            if isinstance(item, dict):
+                price_id = (item.get('price') or {}).get('id')
             else:
-                price_id = items[0].price.id if hasattr(items[0], 'price') else None
+                price = getattr(item, 'price', None)
+                price_id = price.id if price is not None else None
             
-            price_to_tier = get_price_to_tier_map()
-            if price_id and price_id in price_to_tier:
-                return price_to_tier[price_id]
-                        
+            tier = get_price_to_tier_map().get(price_id)
+            if tier:
+                return tier
+        
         # Fallback: check metadata
-        metadata = subscription.get('metadata', {}) if hasattr(subscription, 'get') else getattr(subscription, 'metadata', {})
         if metadata and 'tier' in metadata:
             return metadata['tier']
         
@@ -473,6 +502,12 @@ def format_amount_for_display(amount_cents, currency='usd'):
         return f"{amount_cents / 100:.2f} {currency.upper()}"
 
 
+_PRICE_DISPLAY = {
+    'premium': '$14/month',
+    'pro': '$29/month'
+}
+
+
 def get_price_display(tier):
     """
     Get the display price for a tier.
@@ -483,8 +518,4 @@ def get_price_display(tier):
     Returns:
         str: Price display string or None if tier not found
     """
-    prices = {
-        'premium': '$14/month',
-        'pro': '$29/month'
-    }
-    return prices.get(tier)
+    return _PRICE_DISPLAY.get(tier)
@@ -209,9 +209,12 @@ def can_access_feature(user, feature_name):
     Returns:
         bool: True if user can access the feature
     """
-    tier = get_user_tier(user)
-    tier_config = get_tier_config(tier)
-    return tier_config['features'].get(feature_name, False)
+    return tier_has_feature(get_user_tier(user), feature_name)
+
+
+def tier_has_feature(tier_name, feature_name):
+    """Check a feature against an already-resolved tier name (no user lookup)."""
+    return get_tier_config(tier_name)['features'].get(feature_name, False)
 
 
 def can_use_optimization_method(user, method_name):
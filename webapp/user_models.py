@@ -346,6 +346,54 @@ def get_user_by_clerk_id(session, clerk_user_id):
     return session.query(User).filter_by(clerk_user_id=clerk_user_id).first()
 
 
+def get_user_portfolio_dicts(session, user_id):
+    """
+    All of a user's portfolios as dicts shaped like UserPortfolio.to_dict(include_allocations=True),
+    newest first. Selects plain columns instead of hydrating ORM objects.
+    """
+    from sqlalchemy import select
+    
+    rows = session.execute(
+        select(
+            UserPortfolio.id, UserPortfolio.name, UserPortfolio.description,
+            UserPortfolio.is_public, UserPortfolio.tickers, UserPortfolio.weights,
+            UserPortfolio.constraints, UserPortfolio.cached_return,
+            UserPortfolio.cached_volatility, UserPortfolio.cached_sharpe,
+            UserPortfolio.cached_sortino, UserPortfolio.cached_max_drawdown,
+            UserPortfolio.cached_health_score, UserPortfolio.cached_hhi,
+            UserPortfolio.cached_div_ratio, UserPortfolio.cached_enb,
+            UserPortfolio.metrics_updated_at, UserPortfolio.created_at,
+            UserPortfolio.updated_at
+        ).where(
+            UserPortfolio.user_id == user_id
+        ).order_by(UserPortfolio.updated_at.desc())
+    ).all()
+    
+    return [{
+        'id': r.id,
+        'name': r.name,
+        'description': r.description,
+        'is_public': r.is_public,
+        'metrics': {
+            'return': r.cached_return,
+            'volatility': r.cached_volatility,
+            'sharpe': r.cached_sharpe,
+            'sortino': r.cached_sortino,
+            'max_drawdown': r.cached_max_drawdown,
+            'health_score': r.cached_health_score,
+            'hhi': r.cached_hhi,
+            'diversification_ratio': r.cached_div_ratio,
+            'effective_num_bets': r.cached_enb
+        },
+        'metrics_updated_at': r.metrics_updated_at.isoformat() if r.metrics_updated_at else None,
+        'created_at': r.created_at.isoformat() if r.created_at else None,
+        'updated_at': r.updated_at.isoformat() if r.updated_at else None,
+        'tickers': r.tickers,
+        'weights': r.weights,
+        'constraints': r.constraints
+    } for r in rows]
+
+
 def get_user_by_id(session, user_id):
     """Get user by internal database ID"""
     return session.query(User).filter_by(id=user_id).first()